@@ -6,14 +6,39 @@ ASRプロバイダー抽象化レイヤー
 """
 
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Dict, Any, Optional
+from collections import OrderedDict
+from typing import BinaryIO, Dict, Any, Optional, Set, Tuple
+from urllib.parse import urlencode
+import asyncio
+import bisect
+import functools
+import hashlib
+import io
+import json
+import mimetypes
 import os
-import tempfile
+import queue
 import threading
 import time
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+import wave
+import httpx
+import orjson
+from tenacity import retry, stop_after_attempt, wait_exponential, wait_random, retry_if_exception
 from fastapi import HTTPException
 import logging
+from app.audio_utils import (
+    TARGET_CHANNELS,
+    TARGET_SAMPLE_RATE,
+    UploadReader,
+    get_file_size,
+    is_pcm16_mono_16k,
+    is_pcm_wav,
+    is_silent,
+    iter_file_chunks,
+    normalize_audio,
+    read_header,
+    update_digest,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,10 +50,318 @@ CURRENT_PROVIDER = "deepgram"  # "azure", "groq", または "deepgram"
 CURRENT_MODEL = "nova-2"  # Azure: "ja-JP", Groq: "whisper-large-v3-turbo", Deepgram: "nova-2"
 # ==========================================
 
+# PushAudioInputStreamへ一度に書き込むバイト数
+PUSH_STREAM_CHUNK_BYTES = 32768
+
+# Azureの事前接続済み認識器をフォーマット・モードごとに保持する数
+AZURE_RECOGNIZER_POOL_SIZE = int(os.getenv("AZURE_RECOGNIZER_POOL_SIZE", "2"))
+
+# 事前接続する標準フォーマット（サンプルレート, ビット数, チャンネル数）
+DEFAULT_STREAM_KEY = (16000, 16, 1)
+
+# 文字起こし結果キャッシュの最大件数（同一音声の再処理を省略する）
+ASR_CACHE_SIZE = int(os.getenv("ASR_CACHE_SIZE", "512"))
+
+# 共有キャッシュ（Redis）の接続先（未設定の場合はプロセス内キャッシュのみ使用）
+REDIS_URL = os.getenv("REDIS_URL")
+
+# 共有キャッシュの保持期間（秒、既定は7日）
+ASR_CACHE_TTL_SECONDS = int(os.getenv("ASR_CACHE_TTL_SECONDS", str(7 * 24 * 60 * 60)))
+
+# 共有キャッシュのキー接頭辞（結果の形式を変更した場合はバージョンを上げる）
+REDIS_CACHE_PREFIX = "asr:v1:"
+
+# テキスト長から信頼度を推定する際のしきい値（この文字数を超えると次の段階）
+CONFIDENCE_LENGTH_THRESHOLDS = (5, 20, 50)
+
+# Azure: 段階ごとの (基本信頼度, 上限)。高精度モードでは基本信頼度に加算する
+AZURE_CONFIDENCE_TIERS = ((0.60, 0.85), (0.75, 0.90), (0.85, 0.95), (0.95, 0.98))
+
+# 信頼度を返さないプロバイダー（Groq, aiOla）の段階ごとの推定信頼度
+ESTIMATED_CONFIDENCE_TIERS = (0.75, 0.85, 0.90, 0.95)
+
+# Azure: 音声送信速度（リアルタイム比の%）。スロットリング自体は無効にしない（バッファ溢れによるキャンセル防止）
+AZURE_AUDIO_THROTTLE_PERCENT = os.getenv("AZURE_AUDIO_THROTTLE_PERCENT", "300")
+
+# Azure: 送信速度に関するSDKプロパティ（名前指定で設定）
+AZURE_THROTTLE_PROPERTIES = (
+    ("SPEECH-AudioThrottleAsPercentageOfRealTime", AZURE_AUDIO_THROTTLE_PERCENT),
+    ("SPEECH-TransmitLengthBeforThrottleMs", "5000"),  # SDK側のプロパティ名の綴りのまま
+    ("SPEECH-MaxBufferSizeSeconds", "180"),
+)
+
+# Azure: SpeechConfigに設定するプロパティ（PropertyIdの属性名, 値）
+# SDKは遅延インポートのため属性名で保持し、初期化時に一度だけPropertyIdへ解決する
+# EndSilenceTimeoutMs / InitialSilenceTimeoutMs はSDKの既定値を使用する
+# （大きな値にすると認識待ちの間に送信済み音声がバッファに溜まり、バッファ超過でキャンセルされやすくなる）
+AZURE_STANDARD_PROPERTIES = (
+    ("SpeechServiceConnection_RecoMode", "DICTATION"),  # DICTATION モード（最高精度）
+    ("SpeechServiceResponse_RequestDetailedResultTrueFalse", "true"),  # 詳細結果を要求
+    ("Speech_SegmentationSilenceTimeoutMs", "3000"),  # セグメンテーションの最適化
+)
+AZURE_HIGH_ACCURACY_PROPERTIES = (
+    ("SpeechServiceConnection_RecoMode", "DICTATION"),
+    ("SpeechServiceResponse_RequestDetailedResultTrueFalse", "true"),
+    ("SpeechServiceResponse_RequestWordLevelTimestamps", "true"),
+)
+
+# Azure: 認識キャンセルのうちリトライする（一時的な）エラー詳細（小文字で部分一致、それ以外のキャンセルはリトライしない）
+AZURE_TRANSIENT_CANCELLATION_PATTERNS = ("too many requests", "buffer exceeded")
+
+# Deepgram: fetch-and-transcribeでS3署名付きURLを渡し、プロバイダー側で音声を取得させる（既定は無効）
+ASR_URL_INPUT = os.getenv("ASR_URL_INPUT", "false").lower() == "true"
+
+# Azure: S3署名付きURLを渡してBatch Transcription APIで処理する（fetch-and-transcribe用、既定は無効）
+AZURE_BATCH_TRANSCRIPTION = os.getenv("AZURE_BATCH_TRANSCRIPTION", "false").lower() == "true"
+
+# Azure: バッチ文字起こしジョブの状態確認間隔（秒）
+AZURE_BATCH_POLL_SECONDS = int(os.getenv("AZURE_BATCH_POLL_SECONDS", "5"))
+
+# REST API エンドポイント
+AZURE_BATCH_TRANSCRIPTIONS_URL = "https://{region}.api.cognitive.microsoft.com/speechtotext/v3.1/transcriptions"
+GROQ_TRANSCRIPTIONS_URL = "https://api.groq.com/openai/v1/audio/transcriptions"
+DEEPGRAM_LISTEN_URL = "https://api.deepgram.com/v1/listen"
+DEEPGRAM_STREAM_URL = "wss://api.deepgram.com/v1/listen"
+
+# このサイズを超える音声はDeepgramのWebSocket APIで逐次送信する
+DEEPGRAM_STREAMING_THRESHOLD_BYTES = int(os.getenv("DEEPGRAM_STREAMING_THRESHOLD_BYTES", str(5 * 1024 * 1024)))
+
+# WebSocketで一度に送信するPCMバイト数（16kHz・16bit・モノラルで100ms分）
+DEEPGRAM_STREAM_CHUNK_BYTES = 3200
+
+# プロバイダー共通のHTTPクライアント（接続プールを全リクエストで再利用）
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """共有のhttpx.AsyncClientを取得（未作成・クローズ済みの場合は作成）"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=True,
+            timeout=httpx.Timeout(300.0, connect=10.0),
+            limits=httpx.Limits(max_keepalive_connections=32, max_connections=64)
+        )
+    return _http_client
+
+
+async def close_http_client() -> None:
+    """共有のHTTPクライアントをクローズ（アプリケーション終了時に呼び出す）"""
+    global _http_client
+    if _http_client is not None and not _http_client.is_closed:
+        await _http_client.aclose()
+    _http_client = None
+
+
+async def prewarm_connection(url: str) -> None:
+    """共有HTTPクライアントで接続（DNS解決・TLSハンドシェイク）を確立し、接続プールに保持させる"""
+    try:
+        await get_http_client().head(url)
+    except Exception as e:
+        logger.warning("⚠️ 事前接続に失敗しました: %s - %s", url, e)
+
+
+_redis_client = None
+
+
+def get_redis_client():
+    """共有キャッシュ用のRedisクライアントを取得（REDIS_URL未設定の場合はNone）"""
+    global _redis_client
+    if REDIS_URL and _redis_client is None:
+        import redis.asyncio as redis  # 遅延インポート
+
+        _redis_client = redis.from_url(REDIS_URL)
+    return _redis_client
+
+
+async def close_redis_client() -> None:
+    """共有キャッシュ用のRedisクライアントをクローズ（アプリケーション終了時に呼び出す）"""
+    global _redis_client
+    if _redis_client is not None:
+        await _redis_client.aclose()
+    _redis_client = None
+
+
+async def get_shared_cache(key: str) -> Optional[Dict[str, Any]]:
+    """共有キャッシュから文字起こし結果を取得（障害時はキャッシュミスとして扱う）"""
+    client = get_redis_client()
+    if client is None:
+        return None
+    try:
+        value = await client.get(REDIS_CACHE_PREFIX + key)
+    except Exception as e:
+        logger.warning("⚠️ 共有キャッシュの取得に失敗しました: %s", e)
+        return None
+    return orjson.loads(value) if value is not None else None
+
+
+async def set_shared_cache(key: str, result: Dict[str, Any]) -> None:
+    """共有キャッシュへ文字起こし結果を保存（障害時は保存をスキップ）"""
+    client = get_redis_client()
+    if client is None:
+        return
+    try:
+        await client.set(REDIS_CACHE_PREFIX + key, orjson.dumps(result), ex=ASR_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning("⚠️ 共有キャッシュの保存に失敗しました: %s", e)
+
+
+@functools.lru_cache(maxsize=8)
+def _audio_stream_format(stream_key: tuple):
+    """PCMフォーマット（サンプルレート, ビット数, チャンネル数）ごとのAudioStreamFormatを使い回す"""
+    import azure.cognitiveservices.speech as speechsdk  # 遅延インポート
+
+    samples_per_second, bits_per_sample, channels = stream_key
+    return speechsdk.audio.AudioStreamFormat(
+        samples_per_second=samples_per_second,
+        bits_per_sample=bits_per_sample,
+        channels=channels
+    )
+
+
+def _pump_wav_frames(wav_reader: wave.Wave_read, push_stream) -> None:
+    """WAVのPCMフレームを順次PushAudioInputStreamへ書き込み、EOFでストリームを閉じる"""
+    frame_size = wav_reader.getsampwidth() * wav_reader.getnchannels()
+    frames_per_chunk = max(1, PUSH_STREAM_CHUNK_BYTES // frame_size)
+    try:
+        while True:
+            frames = wav_reader.readframes(frames_per_chunk)
+            if not frames:
+                break
+            push_stream.write(frames)
+    except Exception as e:
+        logger.error("音声ストリーム書き込みエラー: %s", e)
+    finally:
+        push_stream.close()
+
+
+class AzureRecognitionCanceledError(Exception):
+    """Azure音声認識のキャンセル（認証エラー・無効なサブスクリプションなど、リトライしない）"""
+
+
+class TransientAzureError(AzureRecognitionCanceledError):
+    """Azure音声認識のキャンセルのうち、レート制限・バッファ超過などリトライで回復が見込めるもの"""
+
+
+def _is_transient_error(exc: BaseException) -> bool:
+    """
+    リトライで回復が見込めるエラーか判定
+
+    Azureのレート制限・バッファ超過、HTTPの408/429/5xx、通信エラー・タイムアウトのみリトライする。
+    発話なし・認証エラー・音声フォーマットの不正・プログラムの不具合など、それ以外は即座に失敗させる。
+    """
+    # プロバイダーがHTTPExceptionに包んだ場合は元の例外で判定する
+    while isinstance(exc, HTTPException) and exc.__cause__ is not None:
+        exc = exc.__cause__
+
+    if isinstance(exc, TransientAzureError):
+        return True
+    if isinstance(exc, httpx.HTTPStatusError):
+        status_code = exc.response.status_code
+        return status_code >= 500 or status_code in (408, 429)
+    return isinstance(exc, (httpx.TransportError, ConnectionError, TimeoutError))
+
 
 class ASRProvider(ABC):
     """ASRプロバイダーの抽象基底クラス"""
 
+    # 音声内容ハッシュをキーとした文字起こし結果のLRUキャッシュ（全プロバイダー共通）
+    _cache: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+    # 無音判定によりASR呼び出しを省略した回数
+    _silent_skip_count = 0
+
+    # キャッシュヒットによりASR呼び出しを省略した回数
+    _cache_hit_count = 0
+
+    async def transcribe_audio_cached(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        detailed: bool = False,
+        high_accuracy: bool = False,
+        no_cache: bool = False,
+        skip_silent: bool = True
+    ) -> Dict[str, Any]:
+        """
+        同一音声の結果をキャッシュから返す文字起こし
+
+        skip_silent=Trueの場合、無音の音声はASRを呼び出さずに発話なしの結果を返す（結果はキャッシュしない）。
+        キャッシュミス時のみ transcribe_audio を呼び出し、結果を保存する。
+
+        Args:
+            audio_file (BinaryIO): 音声ファイルのバイナリストリーム（シーク可能であること）
+            filename (str): ファイル名
+            detailed (bool): 詳細モード
+            high_accuracy (bool): 高精度モード
+            no_cache (bool): Trueの場合キャッシュを使用しない
+            skip_silent (bool): Falseの場合は無音判定を行わず必ずASRを呼び出す
+
+        Returns:
+            Dict[str, Any]: 文字起こし結果（キャッシュヒット時は cached=True）
+        """
+        use_cache = not no_cache and (ASR_CACHE_SIZE > 0 or REDIS_URL)
+
+        # 無音判定とキャッシュ用のハッシュ計算は1回の読み込みで行う（ファイル全体を読むためイベントループ外で実行）
+        loop = asyncio.get_running_loop()
+        digest = hashlib.blake2b(digest_size=16) if use_cache else None
+
+        start_time = time.time()
+        if not skip_silent:
+            if digest is not None:
+                await loop.run_in_executor(None, update_digest, audio_file, digest)
+        elif await loop.run_in_executor(None, is_silent, audio_file, digest):
+            ASRProvider._silent_skip_count += 1
+            logger.info("🔇 無音のためASR呼び出しを省略: %s (累計%d件)", filename, ASRProvider._silent_skip_count)
+            return {
+                "transcription": "",
+                "processing_time": round(time.time() - start_time, 2),
+                "confidence": 0.0,
+                "word_count": 0,
+                "estimated_duration": 0.0,
+                "no_speech_detected": True,
+                "skipped_silent": True  # ASRを呼ばずに判定した結果（呼び出し側で保存方法を区別する）
+            }
+
+        if not use_cache:
+            return await self.transcribe_audio(audio_file, filename, detailed, high_accuracy)
+
+        key = self._cache_key(digest, detailed, high_accuracy)
+        cached = ASRProvider._cache.get(key)
+        if cached is not None:
+            ASRProvider._cache.move_to_end(key)
+            ASRProvider._cache_hit_count += 1
+            logger.info("♻️ 文字起こしキャッシュヒット: %s (%s, 累計%d件)", filename, self.model_name, ASRProvider._cache_hit_count)
+            return {**cached, "processing_time": 0.0, "cached": True}
+
+        # プロセス内キャッシュにない場合は共有キャッシュ（他ワーカー・再起動前の結果）を確認
+        cached = await get_shared_cache(key)
+        if cached is not None:
+            self._store_local_cache(key, cached)
+            ASRProvider._cache_hit_count += 1
+            logger.info("♻️ 共有キャッシュヒット: %s (%s, 累計%d件)", filename, self.model_name, ASRProvider._cache_hit_count)
+            return {**cached, "processing_time": 0.0, "cached": True}
+
+        result = await self.transcribe_audio(audio_file, filename, detailed, high_accuracy)
+
+        cached = {k: v for k, v in result.items() if k != "processing_time"}
+        self._store_local_cache(key, cached)
+        await set_shared_cache(key, cached)
+
+        return result
+
+    def _store_local_cache(self, key: str, cached: Dict[str, Any]) -> None:
+        """プロセス内キャッシュへ保存し、上限を超えた古いエントリを削除"""
+        if ASR_CACHE_SIZE <= 0:
+            return
+        ASRProvider._cache[key] = cached
+        while len(ASRProvider._cache) > ASR_CACHE_SIZE:
+            ASRProvider._cache.popitem(last=False)
+
+    def _cache_key(self, digest, detailed: bool, high_accuracy: bool) -> str:
+        """音声内容のハッシュとプロバイダー・モード設定からキャッシュキーを生成"""
+        return f"{digest.hexdigest()}:{self.model_name}:{int(detailed)}:{int(high_accuracy)}"
+
     @abstractmethod
     async def transcribe_audio(
         self,
@@ -57,6 +390,44 @@ class ASRProvider(ABC):
         """
         pass
 
+    def warm_up(self) -> None:
+        """起動時の事前準備（接続の確立など）。必要なプロバイダーのみオーバーライドする"""
+        pass
+
+    @property
+    def supports_url_input(self) -> bool:
+        """音声URLを直接渡して文字起こしできるか（対応プロバイダーのみオーバーライドする）"""
+        return False
+
+    @property
+    def reusable(self) -> bool:
+        """インスタンスを使い回せるか（初期化時の認証情報に有効期限があるプロバイダーのみFalseにする）"""
+        return True
+
+    async def transcribe_url(
+        self,
+        audio_url: str,
+        filename: str,
+        detailed: bool = False,
+        high_accuracy: bool = False
+    ) -> Dict[str, Any]:
+        """
+        URL上の音声をプロバイダー側で取得して文字起こしする（supports_url_inputがTrueの場合のみ）
+
+        Args:
+            audio_url (str): 音声ファイルのURL（S3署名付きURLなど）
+            filename (str): ファイル名（ログ用）
+            detailed (bool): 詳細モード
+            high_accuracy (bool): 高精度モード
+
+        Returns:
+            Dict[str, Any]: transcribe_audioと同じ形式の文字起こし結果
+
+        Raises:
+            HTTPException: URL入力に対応していないプロバイダーの場合（501）
+        """
+        raise HTTPException(status_code=501, detail=f"{self.provider_name}はURL入力に対応していません")
+
     @property
     @abstractmethod
     def provider_name(self) -> str:
@@ -89,58 +460,120 @@ class AzureProvider(ASRProvider):
 
         self._model = model
 
-        # Azure Speech Config
-        self.speech_config = speechsdk.SpeechConfig(
+        # 標準モード / 高精度モードの Speech Config（リクエストごとに作り直さないよう初期化時に構築）
+        self.speech_config = self._build_speech_config(speechsdk, AZURE_STANDARD_PROPERTIES)
+        self.high_accuracy_speech_config = self._build_speech_config(speechsdk, AZURE_HIGH_ACCURACY_PROPERTIES)
+
+        # 事前接続済み認識器のプール（キー: (高精度モード, サンプルレート, ビット数, チャンネル数)）
+        self._recognizer_pools: Dict[tuple, queue.Queue] = {}
+
+        logger.info("Azure Speech Service初期化完了: region=%s, language=%s", self.service_region, model)
+
+    def _build_speech_config(self, speechsdk, properties) -> Any:
+        """言語・認識プロパティ・送信速度の上限を設定したSpeechConfigを構築"""
+        speech_config = speechsdk.SpeechConfig(
             subscription=self.speech_key,
             region=self.service_region
         )
+        speech_config.speech_recognition_language = self._model
+        speech_config.enable_dictation = True  # 句読点の自動挿入
 
-        # 言語設定
-        self.speech_config.speech_recognition_language = model
+        for property_name, value in properties:
+            try:
+                speech_config.set_property(getattr(speechsdk.PropertyId, property_name), value)
+            except (AttributeError, ValueError) as e:
+                # SDKバージョンによって未対応のプロパティは個別にスキップ
+                logger.warning("Azure設定 %s をスキップしました: %s", property_name, e)
+
+        # ファイル入力の送信速度の上限を引き上げる（既定はリアルタイムの2倍速）
+        for name, value in AZURE_THROTTLE_PROPERTIES:
+            speech_config.set_property_by_name(name, value)
+
+        return speech_config
+
+    def warm_up(self) -> None:
+        """標準フォーマット（16kHz/16bit/モノラル）の認識器を事前接続してプールに用意"""
+        for high_accuracy in (False, True):
+            for _ in range(AZURE_RECOGNIZER_POOL_SIZE):
+                threading.Thread(
+                    target=self._prepare_recognizer,
+                    args=(high_accuracy, DEFAULT_STREAM_KEY),
+                    daemon=True
+                ).start()
+
+    def _create_recognizer(self, high_accuracy: bool, stream_key: tuple):
+        """指定フォーマットのPushAudioInputStreamに接続したSpeechRecognizerを生成"""
+        import azure.cognitiveservices.speech as speechsdk
 
-        # 高精度モードのための設定
-        try:
-            # 1. DICTATION モード（最高精度）
-            self.speech_config.set_property(
-                speechsdk.PropertyId.SpeechServiceConnection_RecoMode,
-                "DICTATION"
-            )
+        push_stream = speechsdk.audio.PushAudioInputStream(stream_format=_audio_stream_format(stream_key))
+        audio_input = speechsdk.audio.AudioConfig(stream=push_stream)
 
-            # 2. 詳細結果を要求
-            self.speech_config.set_property(
-                speechsdk.PropertyId.SpeechServiceResponse_RequestDetailedResultTrueFalse,
-                "true"
-            )
+        # 高精度モードの場合、初期化済みの専用設定を適用
+        speech_config = self.high_accuracy_speech_config if high_accuracy else self.speech_config
+        speech_recognizer = speechsdk.SpeechRecognizer(
+            speech_config=speech_config,
+            audio_config=audio_input
+        )
+        return speech_recognizer, push_stream
 
-            # 3. 音声品質の最適化
-            self.speech_config.set_property(
-                speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs,
-                "5000"
-            )
-            self.speech_config.set_property(
-                speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs,
-                "15000"
-            )
+    def _prepare_recognizer(self, high_accuracy: bool, stream_key: tuple) -> None:
+        """認識器を生成してWebSocket接続を事前に確立し、プールへ追加（バックグラウンドスレッド用）"""
+        import azure.cognitiveservices.speech as speechsdk
 
-            # 4. セグメンテーションの最適化
-            self.speech_config.set_property(
-                speechsdk.PropertyId.Speech_SegmentationSilenceTimeoutMs,
-                "3000"
-            )
+        pool = self._recognizer_pools.setdefault((high_accuracy, *stream_key), queue.Queue())
+        if pool.qsize() >= AZURE_RECOGNIZER_POOL_SIZE:
+            return
 
-            # 5. 句読点の自動挿入
-            self.speech_config.enable_dictation = True
+        try:
+            speech_recognizer, push_stream = self._create_recognizer(high_accuracy, stream_key)
+            connection = speechsdk.Connection.from_recognizer(speech_recognizer)
+
+            # 待機中にサーバー側から切断された認識器は取得時に破棄する
+            disconnected = threading.Event()
+            connection.disconnected.connect(lambda evt: disconnected.set())
 
+            connection.open(True)  # 連続認識用に接続
+            pool.put((speech_recognizer, push_stream, connection, disconnected))
         except Exception as e:
-            logger.warning(f"一部の高度な設定をスキップしました: {e}")
+            logger.warning("Azure認識器の事前接続に失敗しました: %s", e)
 
-        logger.info(f"Azure Speech Service初期化完了: region={self.service_region}, language={model}")
+    def _acquire_recognizer(self, high_accuracy: bool, stream_key: tuple):
+        """
+        プールから事前接続済みの認識器を取得する
+
+        SpeechRecognizerは生成時の音声入力に固定されるため使い回しはできない。
+        取り出した分はバックグラウンドで補充し、接続確立をリクエストの処理経路から外す。
+        """
+        pool = self._recognizer_pools.setdefault((high_accuracy, *stream_key), queue.Queue())
+        refill_count = 1
+        while True:
+            try:
+                speech_recognizer, push_stream, connection, disconnected = pool.get_nowait()
+            except queue.Empty:
+                speech_recognizer, push_stream = self._create_recognizer(high_accuracy, stream_key)
+                connection = None
+                break
+            if not disconnected.is_set():
+                break
+            # アイドル中に切断済み（再接続のコストが処理経路に乗る）のため破棄して次を使う
+            refill_count += 1
+
+        for _ in range(refill_count):
+            threading.Thread(
+                target=self._prepare_recognizer,
+                args=(high_accuracy, stream_key),
+                daemon=True
+            ).start()
+
+        return speech_recognizer, push_stream, connection
+
+    def _open_recognition(self, audio_file: BinaryIO, high_accuracy: bool):
+        """WAVヘッダーからPCMフォーマットを取得し、対応する認識器を取得（一時ファイルを経由せずSDKへ直接渡す）"""
+        audio_file.seek(0)
+        wav_reader = wave.open(audio_file, 'rb')
+        stream_key = (wav_reader.getframerate(), wav_reader.getsampwidth() * 8, wav_reader.getnchannels())
+        return wav_reader, self._acquire_recognizer(high_accuracy, stream_key)
 
-    @retry(
-        stop=stop_after_attempt(2),
-        wait=wait_exponential(multiplier=1, min=2, max=5),
-        retry=retry_if_exception_type(Exception)
-    )
     async def transcribe_audio(
         self,
         audio_file: BinaryIO,
@@ -148,73 +581,62 @@ class AzureProvider(ASRProvider):
         detailed: bool = False,
         high_accuracy: bool = False
     ) -> Dict[str, Any]:
-        """Azure Speech Serviceで音声ファイルを文字起こし（リトライ付き）"""
-        import azure.cognitiveservices.speech as speechsdk
+        """Azure Speech Serviceで音声ファイルを文字起こし"""
+        # PushAudioInputStreamにはPCMを渡すため、mp3/m4a等はリトライの外で1回だけWAVへ変換する
+        upload_file, upload_filename = await normalize_audio(audio_file, filename)
 
-        try:
-            # 一時ファイルに保存
-            with tempfile.NamedTemporaryFile(delete=False, suffix=os.path.splitext(filename)[1]) as temp_file:
-                content = audio_file.read()
-                temp_file.write(content)
-                temp_file_path = temp_file.name
+        # ffmpegがない・変換に失敗した場合はPCMとして読めずに失敗するため、リトライせずに即座にエラーにする
+        if not is_pcm_wav(read_header(upload_file)):
+            raise HTTPException(
+                status_code=415,
+                detail=f"PCM WAVへ変換できない音声です（mp3/m4aの処理にはffmpegが必要です）: {filename}"
+            )
 
-            # Azure Speech Recognition
-            audio_input = speechsdk.AudioConfig(filename=temp_file_path)
+        return await self._transcribe_normalized(upload_file, upload_filename, detailed, high_accuracy)
 
-            # 高精度モードの場合、専用設定を適用
-            if high_accuracy:
-                high_accuracy_config = speechsdk.SpeechConfig(
-                    subscription=self.speech_key,
-                    region=self.service_region
-                )
-                high_accuracy_config.speech_recognition_language = self._model
+    @retry(
+        stop=stop_after_attempt(2),
+        wait=wait_exponential(multiplier=1, min=2, max=5) + wait_random(0, 1),
+        retry=retry_if_exception(_is_transient_error)
+    )
+    async def _transcribe_normalized(
+        self,
+        audio_file: BinaryIO,
+        filename: str,
+        detailed: bool,
+        high_accuracy: bool
+    ) -> Dict[str, Any]:
+        """PCM WAVの音声をAzure Speech Serviceで文字起こし（リトライ付き）"""
+        import azure.cognitiveservices.speech as speechsdk
 
-                try:
-                    high_accuracy_config.set_property(
-                        speechsdk.PropertyId.SpeechServiceConnection_RecoMode,
-                        "DICTATION"
-                    )
-                    high_accuracy_config.set_property(
-                        speechsdk.PropertyId.SpeechServiceResponse_RequestDetailedResultTrueFalse,
-                        "true"
-                    )
-                    high_accuracy_config.set_property(
-                        speechsdk.PropertyId.SpeechServiceConnection_EndSilenceTimeoutMs,
-                        "8000"
-                    )
-                    high_accuracy_config.set_property(
-                        speechsdk.PropertyId.SpeechServiceConnection_InitialSilenceTimeoutMs,
-                        "20000"
-                    )
-                    high_accuracy_config.enable_dictation = True
-                    high_accuracy_config.set_property(
-                        speechsdk.PropertyId.SpeechServiceResponse_RequestWordLevelTimestamps,
-                        "true"
-                    )
-                except Exception as e:
-                    logger.warning(f"高精度設定の一部をスキップ: {e}")
+        try:
+            loop = asyncio.get_running_loop()
 
-                speech_recognizer = speechsdk.SpeechRecognizer(
-                    speech_config=high_accuracy_config,
-                    audio_config=audio_input
-                )
-            else:
-                speech_recognizer = speechsdk.SpeechRecognizer(
-                    speech_config=self.speech_config,
-                    audio_config=audio_input
-                )
+            # WAVヘッダーの読み込みと認識器の取得（プールが空の場合は生成）はブロッキング処理のためイベントループ外で実行
+            # connectionは認識完了まで参照を保持して事前接続を維持する
+            wav_reader, (speech_recognizer, push_stream, connection) = await loop.run_in_executor(
+                None, self._open_recognition, audio_file, high_accuracy
+            )
 
             # 処理時間計測開始
             start_time = time.time()
 
             # 長時間音声認識のための設定
-            all_results = []
+            # SDKのコールバックは別スレッドで呼ばれるため、完了通知はイベントループ経由で行う
+            transcript_buffer = io.StringIO()  # 認識結果を逐次連結（最後にjoinし直さない）
+            segment_count = 0
+            word_count = 0
             recognition_errors = []
-            done = threading.Event()
+            done = asyncio.Event()
 
             def handle_final_result(evt):
+                nonlocal segment_count, word_count
                 if evt.result.reason == speechsdk.ResultReason.RecognizedSpeech:
-                    all_results.append(evt.result.text)
+                    if segment_count:
+                        transcript_buffer.write(" ")
+                    transcript_buffer.write(evt.result.text)
+                    segment_count += 1
+                    word_count += len(evt.result.text.split())
                 elif evt.result.reason == speechsdk.ResultReason.NoMatch:
                     recognition_errors.append({
                         "type": "NoMatch",
@@ -235,52 +657,54 @@ class AzureProvider(ASRProvider):
                     "reason": str(cancellation_details.reason),
                     "error_details": cancellation_details.error_details or "詳細なし"
                 })
-                done.set()
+                loop.call_soon_threadsafe(done.set)
 
             def handle_session_stopped(evt):
-                done.set()
+                loop.call_soon_threadsafe(done.set)
 
             # イベントハンドラーを設定
             speech_recognizer.recognized.connect(handle_final_result)
             speech_recognizer.canceled.connect(handle_canceled)
             speech_recognizer.session_stopped.connect(handle_session_stopped)
 
-            # 連続音声認識開始
-            speech_recognizer.start_continuous_recognition()
+            # 連続音声認識開始（ブロッキング呼び出しのためイベントループ外で実行）
+            await loop.run_in_executor(None, speech_recognizer.start_continuous_recognition)
 
-            # 認識完了まで待機
-            timeout = 600 if high_accuracy else 300
-            done.wait(timeout=timeout)
+            # 音声データをバックグラウンドスレッドでストリームへ書き込み
+            pump_thread = threading.Thread(
+                target=_pump_wav_frames,
+                args=(wav_reader, push_stream),
+                daemon=True
+            )
+            pump_thread.start()
 
-            # 認識停止
-            speech_recognizer.stop_continuous_recognition()
+            # 認識完了まで待機（イベントループは他のリクエストを処理可能）
+            timeout = 600 if high_accuracy else 300
+            try:
+                await asyncio.wait_for(done.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning("⚠️ Azure音声認識がタイムアウトしました（%s秒）: %s", timeout, filename)
+            finally:
+                # 認識停止（クライアント切断でキャンセルされた場合も確実に停止する）
+                await loop.run_in_executor(None, speech_recognizer.stop_continuous_recognition)
+                await loop.run_in_executor(None, pump_thread.join, 5)
 
             # 処理時間計測終了
             processing_time = time.time() - start_time
 
-            # 一時ファイル削除
-            os.unlink(temp_file_path)
-
             # 結果の分析と適切なレスポンス生成
-            if all_results:
-                full_transcription = " ".join(all_results)
+            if segment_count:
+                full_transcription = transcript_buffer.getvalue()
 
                 # 信頼度計算
                 text_length = len(full_transcription)
                 base_confidence = 0.05 if high_accuracy else 0.0
 
-                if text_length > 50:
-                    confidence = min(0.98, 0.95 + base_confidence)
-                elif text_length > 20:
-                    confidence = min(0.95, 0.85 + base_confidence)
-                elif text_length > 5:
-                    confidence = min(0.90, 0.75 + base_confidence)
-                else:
-                    confidence = min(0.85, 0.60 + base_confidence)
+                tier_confidence, max_confidence = AZURE_CONFIDENCE_TIERS[
+                    bisect.bisect_left(CONFIDENCE_LENGTH_THRESHOLDS, text_length)
+                ]
+                confidence = min(max_confidence, tier_confidence + base_confidence)
 
-                # 単語数計算
-                words = full_transcription.split()
-                word_count = len(words)
                 estimated_duration = round(processing_time * 0.8, 2)
 
                 result = {
@@ -318,20 +742,20 @@ class AzureProvider(ASRProvider):
                 }
 
         except Exception as e:
-            if 'temp_file_path' in locals():
-                try:
-                    os.unlink(temp_file_path)
-                except:
-                    pass
-            raise HTTPException(status_code=500, detail=f"Azure音声処理エラー: {str(e)}")
+            raise HTTPException(status_code=500, detail=f"Azure音声処理エラー: {str(e)}") from e
 
     def _handle_recognition_errors(self, recognition_errors):
-        """認識エラーの種類に応じて適切なHTTPExceptionを発生させる"""
-        has_no_match = any(err["type"] == "NoMatch" for err in recognition_errors)
-        has_canceled = any(err["type"] in ["Canceled", "SessionCanceled"] for err in recognition_errors)
-
-        if has_canceled:
-            canceled_errors = [err for err in recognition_errors if err["type"] in ["Canceled", "SessionCanceled"]]
+        """認識エラーの種類に応じて例外を発生させる（キャンセルはエラー詳細でリトライ可否を分ける）"""
+        # 1回の走査で種類ごとに振り分ける
+        canceled_errors = []
+        no_match_count = 0
+        for err in recognition_errors:
+            if err["type"] in ("Canceled", "SessionCanceled"):
+                canceled_errors.append(err)
+            elif err["type"] == "NoMatch":
+                no_match_count += 1
+
+        if canceled_errors:
             error_details = []
 
             for err in canceled_errors:
@@ -340,14 +764,17 @@ class AzureProvider(ASRProvider):
                 else:
                     error_details.append(f"{err['type']}: {err['reason']}")
 
-            raise HTTPException(
-                status_code=500,
-                detail=f"音声認識がキャンセルされました: {'; '.join(error_details)}"
-            )
-
-        elif has_no_match:
-            no_match_count = sum(1 for err in recognition_errors if err["type"] == "NoMatch")
-
+            message = f"音声認識がキャンセルされました: {'; '.join(error_details)}"
+            # レート制限・バッファ超過のみリトライし、認証エラーなどは即座に失敗させる
+            if any(
+                pattern in (err.get("error_details") or "").lower()
+                for err in canceled_errors
+                for pattern in AZURE_TRANSIENT_CANCELLATION_PATTERNS
+            ):
+                raise TransientAzureError(message)
+            raise AzureRecognitionCanceledError(message)
+
+        elif no_match_count:
             if no_match_count == len(recognition_errors):
                 raise HTTPException(
                     status_code=400,
@@ -366,6 +793,115 @@ class AzureProvider(ASRProvider):
                 detail=f"音声認識で予期しないエラーが発生しました: {error_summary}"
             )
 
+    @property
+    def supports_url_input(self) -> bool:
+        return AZURE_BATCH_TRANSCRIPTION
+
+    async def transcribe_url(
+        self,
+        audio_url: str,
+        filename: str,
+        detailed: bool = False,
+        high_accuracy: bool = False
+    ) -> Dict[str, Any]:
+        """Azure Batch Transcription APIでURL上の音声を文字起こし（リアルタイムの2倍速制限を受けない）"""
+        start_time = time.time()
+        client = get_http_client()
+        headers = {"Ocp-Apim-Subscription-Key": self.speech_key}
+
+        try:
+            response = await client.post(
+                AZURE_BATCH_TRANSCRIPTIONS_URL.format(region=self.service_region),
+                headers=headers,
+                json={
+                    "contentUrls": [audio_url],
+                    "locale": self._model,
+                    "displayName": filename,
+                    "properties": {
+                        "punctuationMode": "DictatedAndAutomatic",
+                        "profanityFilterMode": "None",
+                        "timeToLive": "PT1H"  # 結果はAzure側で1時間後に自動削除
+                    }
+                }
+            )
+            response.raise_for_status()
+            transcription_url = response.json()["self"]
+
+            # ジョブ完了までポーリング
+            timeout = 600 if high_accuracy else 300
+            while True:
+                response = await client.get(transcription_url, headers=headers)
+                response.raise_for_status()
+                job = response.json()
+                if job["status"] == "Succeeded":
+                    break
+                if job["status"] == "Failed":
+                    error = job.get("properties", {}).get("error", {})
+                    raise HTTPException(
+                        status_code=500,
+                        detail=f"Azureバッチ文字起こしが失敗しました: {error.get('code')} - {error.get('message')}"
+                    )
+                if time.time() - start_time > timeout:
+                    raise HTTPException(status_code=504, detail=f"Azureバッチ文字起こしがタイムアウトしました（{timeout}秒）")
+                await asyncio.sleep(AZURE_BATCH_POLL_SECONDS)
+
+            # 結果ファイルの取得（contentUrlはSAS付きのためキー不要）
+            response = await client.get(job["links"]["files"], headers=headers)
+            response.raise_for_status()
+            content_url = next(
+                f["links"]["contentUrl"] for f in response.json()["values"] if f["kind"] == "Transcription"
+            )
+            response = await client.get(content_url)
+            response.raise_for_status()
+            transcription = response.json()
+
+            processing_time = time.time() - start_time
+
+            phrases = transcription.get("combinedRecognizedPhrases") or []
+            full_transcription = " ".join(p["display"] for p in phrases if p.get("display")).strip()
+            duration = transcription.get("durationInTicks", 0) / 10_000_000  # 100ナノ秒単位
+
+            if not full_transcription:
+                return {
+                    "transcription": "",
+                    "processing_time": round(processing_time, 2),
+                    "confidence": 0.0,
+                    "word_count": 0,
+                    "estimated_duration": round(duration, 2),
+                    "no_speech_detected": True
+                }
+
+            # 信頼度はフレーズごとの最良候補の平均
+            confidences = [
+                p["nBest"][0]["confidence"]
+                for p in transcription.get("recognizedPhrases", [])
+                if p.get("nBest")
+            ]
+            confidence = sum(confidences) / len(confidences) if confidences else 0.0
+
+            result = {
+                "transcription": full_transcription,
+                "processing_time": round(processing_time, 2),
+                "confidence": round(confidence, 2),
+                "word_count": len(full_transcription.split()),
+                "estimated_duration": round(duration, 2)
+            }
+
+            if detailed:
+                result["detailed_mode"] = True
+
+            if high_accuracy:
+                result["mode"] = "high_accuracy"
+                result["timeout_used"] = timeout
+
+            return result
+
+        except HTTPException:
+            raise
+        except Exception as e:
+            logger.error("❌ Azureバッチ文字起こしエラー: %s", e)
+            raise HTTPException(status_code=500, detail=f"Azure音声処理エラー: {str(e)}") from e
+
     @property
     def provider_name(self) -> str:
         return "azure"
@@ -384,22 +920,19 @@ class GroqProvider(ASRProvider):
             model (str): 使用するGroq Whisperモデル名
                 例: "whisper-large-v3-turbo", "whisper-large-v3"
         """
-        from groq import Groq  # 遅延インポート
-
         api_key = os.getenv("GROQ_API_KEY")
         if not api_key:
             raise ValueError("GROQ_API_KEY環境変数が設定されていません")
 
-        self.client = Groq(api_key=api_key)
+        self._headers = {"Authorization": f"Bearer {api_key}"}
         self._model = model
 
-        logger.info(f"Groq Whisper API初期化完了: model={model}")
+        logger.info("Groq Whisper API初期化完了: model=%s", model)
+
+    def warm_up(self) -> None:
+        """APIエンドポイントへのTLS接続を事前に確立（初回リクエストのハンドシェイクを省略）"""
+        self._warm_up_task = asyncio.get_running_loop().create_task(prewarm_connection(GROQ_TRANSCRIPTIONS_URL))
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception)
-    )
     async def transcribe_audio(
         self,
         audio_file: BinaryIO,
@@ -407,29 +940,54 @@ class GroqProvider(ASRProvider):
         detailed: bool = False,
         high_accuracy: bool = False
     ) -> Dict[str, Any]:
-        """Groq Whisper APIで音声ファイルを文字起こし（リトライ付き）"""
-        try:
-            # 処理時間計測開始
-            start_time = time.time()
+        """Groq Whisper APIで音声ファイルを文字起こし"""
+        # 処理時間計測開始
+        start_time = time.time()
 
-            # Groq Whisper API呼び出し
-            # audio_fileの位置を先頭に戻す（既に読まれている可能性があるため）
-            audio_file.seek(0)
+        # 16kHz・モノラル・16bit PCMへ変換してから送信（サーバー側のデコード負荷を削減）
+        # 変換はリトライの外で1回だけ行い、変換不要な場合はファイルをそのままmultipartでチャンク送信する
+        upload_file, upload_filename = await normalize_audio(audio_file, filename)
+        return await self._transcribe_normalized(upload_file, upload_filename, detailed, start_time)
 
-            transcription = self.client.audio.transcriptions.create(
-                file=(filename, audio_file.read()),
-                model=self._model,
-                language="ja",  # 日本語として認識（精度向上＋ハルシネーション抑制）
-                prompt="日本語の会話。無音や雑音のみの場合は空文字を返してください。",  # ハルシネーション抑制
-                temperature=0.0,  # 確定的な出力（ランダム性なし）
-                response_format="verbose_json",
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+        retry=retry_if_exception(_is_transient_error)
+    )
+    async def _transcribe_normalized(
+        self,
+        upload_file: BinaryIO,
+        upload_filename: str,
+        detailed: bool,
+        start_time: float
+    ) -> Dict[str, Any]:
+        """前処理済みの音声をGroq Whisper APIで文字起こし（リトライ付き）"""
+        try:
+            # Groq Whisper API呼び出し
+            # upload_fileの位置を先頭に戻す（前回の試行で読まれている可能性があるため）
+            upload_file.seek(0)
+
+            response = await get_http_client().post(
+                GROQ_TRANSCRIPTIONS_URL,
+                headers=self._headers,
+                # メモリ上のSpooledTemporaryFileがディスクへ書き出されないよう、fileno()を隠して渡す
+                files={"file": (upload_filename, UploadReader(upload_file))},
+                data={
+                    "model": self._model,
+                    "language": "ja",  # 日本語として認識（精度向上＋ハルシネーション抑制）
+                    "prompt": "日本語の会話。無音や雑音のみの場合は空文字を返してください。",  # ハルシネーション抑制
+                    "temperature": "0.0",  # 確定的な出力（ランダム性なし）
+                    "response_format": "verbose_json",
+                }
             )
+            response.raise_for_status()
+            transcription = response.json()
 
             # 処理時間計測終了
             processing_time = time.time() - start_time
 
             # テキスト取得
-            transcription_text = transcription.text.strip() if transcription.text else ""
+            transcription_text = (transcription.get("text") or "").strip()
 
             # 発話なしの判定
             if not transcription_text:
@@ -447,18 +1005,11 @@ class GroqProvider(ASRProvider):
             word_count = len(words)
 
             # verbose_jsonから追加情報を取得（利用可能な場合）
-            duration = getattr(transcription, 'duration', None) or round(processing_time * 0.8, 2)
+            duration = transcription.get("duration") or round(processing_time * 0.8, 2)
 
             # Groqは信頼度を直接提供しないため、テキスト長から推定
             text_length = len(transcription_text)
-            if text_length > 50:
-                confidence = 0.95
-            elif text_length > 20:
-                confidence = 0.90
-            elif text_length > 5:
-                confidence = 0.85
-            else:
-                confidence = 0.75
+            confidence = ESTIMATED_CONFIDENCE_TIERS[bisect.bisect_left(CONFIDENCE_LENGTH_THRESHOLDS, text_length)]
 
             result = {
                 "transcription": transcription_text,
@@ -469,15 +1020,15 @@ class GroqProvider(ASRProvider):
             }
 
             # verbose_jsonの詳細情報を含める（detailedモード）
-            if detailed and hasattr(transcription, 'segments'):
+            if detailed and "segments" in transcription:
                 result["detailed_mode"] = True
-                result["segments"] = transcription.segments
+                result["segments"] = transcription["segments"]
 
             return result
 
         except Exception as e:
-            logger.error(f"❌ Groq Whisper API呼び出しエラー: {e}")
-            raise HTTPException(status_code=500, detail=f"Groq音声処理エラー: {str(e)}")
+            logger.error("❌ Groq Whisper API呼び出しエラー: %s", e)
+            raise HTTPException(status_code=500, detail=f"Groq音声処理エラー: {str(e)}") from e
 
     @property
     def provider_name(self) -> str:
@@ -497,22 +1048,19 @@ class DeepgramProvider(ASRProvider):
             model (str): 使用するDeepgramモデル名
                 例: "nova-3", "nova-2", "whisper", "enhanced"
         """
-        from deepgram import DeepgramClient  # 遅延インポート
-
         api_key = os.getenv("DEEPGRAM_API_KEY")
         if not api_key:
             raise ValueError("DEEPGRAM_API_KEY環境変数が設定されていません")
 
-        self.client = DeepgramClient(api_key=api_key)  # キーワード引数で渡す
+        self._api_key = api_key
         self._model = model
 
-        logger.info(f"Deepgram API初期化完了: model={model}")
+        logger.info("Deepgram API初期化完了: model=%s", model)
+
+    def warm_up(self) -> None:
+        """APIエンドポイントへのTLS接続を事前に確立（初回リクエストのハンドシェイクを省略）"""
+        self._warm_up_task = asyncio.get_running_loop().create_task(prewarm_connection(DEEPGRAM_LISTEN_URL))
 
-    @retry(
-        stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception)
-    )
     async def transcribe_audio(
         self,
         audio_file: BinaryIO,
@@ -520,55 +1068,73 @@ class DeepgramProvider(ASRProvider):
         detailed: bool = False,
         high_accuracy: bool = False
     ) -> Dict[str, Any]:
-        """Deepgram APIで音声ファイルを文字起こし（リトライ付き）"""
-        try:
-            # 処理時間計測開始
-            start_time = time.time()
+        """Deepgram APIで音声ファイルを文字起こし"""
+        # 処理時間計測開始
+        start_time = time.time()
 
-            # audio_fileの位置を先頭に戻す
-            audio_file.seek(0)
-            audio_data = audio_file.read()
+        # 16kHz・モノラル・16bit PCMへ変換してから送信（サーバー側のデコード負荷を削減）
+        # 変換はリトライの外で1回だけ行う
+        upload_file, upload_filename = await normalize_audio(audio_file, filename)
+        return await self._transcribe_normalized(upload_file, upload_filename, detailed, start_time)
 
-            # Deepgram APIオプション設定
+    @retry(
+        stop=stop_after_attempt(3),
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+        retry=retry_if_exception(_is_transient_error)
+    )
+    async def _transcribe_normalized(
+        self,
+        upload_file: Optional[BinaryIO],
+        upload_filename: str,
+        detailed: bool,
+        start_time: float,
+        audio_url: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """前処理済みの音声（またはURL上の音声）をDeepgram APIで文字起こし（リトライ付き）"""
+        try:
+            # Deepgram APIオプション設定（クエリパラメータとして送信）
             options = {
                 "model": self._model,
                 "language": "ja",  # 日本語
-                "punctuate": True,  # 句読点の自動挿入
-                "diarize": True,    # 話者分離
-                "smart_format": True,  # スマートフォーマット（日付、時刻、数字の自動整形）
-                "utterances": True,  # 発話単位での区切り
+                "punctuate": "true",  # 句読点の自動挿入
+                "diarize": "true",    # 話者分離
+                "smart_format": "true",  # スマートフォーマット（日付、時刻、数字の自動整形）
             }
 
-            # 高精度モードの場合、追加オプションを設定
-            if high_accuracy:
-                options.update({
-                    "tier": "nova",  # 最高精度
-                })
-
-            # Deepgram API呼び出し（SDK v3.7.0 - 公式ドキュメント準拠）
-            from deepgram import PrerecordedOptions
-
-            # PrerecordedOptionsオブジェクトを作成
-            prerecorded_options = PrerecordedOptions(
-                model=options["model"],
-                language=options["language"],
-                punctuate=options["punctuate"],
-                diarize=options["diarize"],
-                smart_format=options["smart_format"],
-                utterances=options["utterances"],
-            )
-
-            # SDK v3.7.0の正しいAPI: client.listen.rest.v("1").transcribe_file()
-            response = self.client.listen.rest.v("1").transcribe_file(
-                source={"buffer": audio_data},
-                options=prerecorded_options
-            )
+            if audio_url:
+                # URLを渡してDeepgram側で音声を取得させる（本サーバーを音声データが経由しない）
+                http_response = await get_http_client().post(
+                    DEEPGRAM_LISTEN_URL,
+                    params={**options, "utterances": "true"},
+                    headers={"Authorization": f"Token {self._api_key}"},
+                    json={"url": audio_url}
+                )
+                http_response.raise_for_status()
+                response = http_response.json()
+            elif (upload_size := get_file_size(upload_file)) > DEEPGRAM_STREAMING_THRESHOLD_BYTES and is_pcm16_mono_16k(read_header(upload_file)):
+                # 大きなファイルはWebSocket APIへ逐次送信（全体のアップロード完了を待たずに認識開始）
+                response = await self._listen_streaming(upload_file, options)
+            else:
+                # Deepgram REST API呼び出し（/v1/listen に音声バイナリをチャンク単位でPOST）
+                http_response = await get_http_client().post(
+                    DEEPGRAM_LISTEN_URL,
+                    params={**options, "utterances": "true"},  # 発話単位での区切り
+                    headers={
+                        "Authorization": f"Token {self._api_key}",
+                        "Content-Type": mimetypes.guess_type(upload_filename)[0] or "application/octet-stream",
+                        "Content-Length": str(upload_size),
+                    },
+                    content=iter_file_chunks(upload_file)
+                )
+                http_response.raise_for_status()
+                response = http_response.json()
 
             # 処理時間計測終了
             processing_time = time.time() - start_time
 
             # レスポンスから文字起こしテキストを取得
-            if not response or not response.results:
+            results = response.get("results") if response else None
+            if not results:
                 return {
                     "transcription": "",
                     "processing_time": round(processing_time, 2),
@@ -579,8 +1145,8 @@ class DeepgramProvider(ASRProvider):
                 }
 
             # チャンネル情報を取得
-            channels = response.results.channels
-            if not channels or len(channels) == 0:
+            channels = results.get("channels")
+            if not channels:
                 return {
                     "transcription": "",
                     "processing_time": round(processing_time, 2),
@@ -591,8 +1157,8 @@ class DeepgramProvider(ASRProvider):
                 }
 
             # 最初のチャンネルの最初の代替案を取得
-            alternatives = channels[0].alternatives
-            if not alternatives or len(alternatives) == 0:
+            alternatives = channels[0].get("alternatives")
+            if not alternatives:
                 return {
                     "transcription": "",
                     "processing_time": round(processing_time, 2),
@@ -602,7 +1168,8 @@ class DeepgramProvider(ASRProvider):
                     "no_speech_detected": True
                 }
 
-            transcript = alternatives[0].transcript.strip() if alternatives[0].transcript else ""
+            best = alternatives[0]
+            transcript = (best.get("transcript") or "").strip()
 
             # 発話なしの判定
             if not transcript:
@@ -616,16 +1183,14 @@ class DeepgramProvider(ASRProvider):
                 }
 
             # 信頼度を取得（Deepgramは0-1の範囲で提供）
-            confidence = alternatives[0].confidence if hasattr(alternatives[0], 'confidence') else 0.0
+            confidence = best.get("confidence", 0.0)
 
             # 単語数計算
             words = transcript.split()
             word_count = len(words)
 
             # 音声の長さを取得（メタデータから）
-            duration = 0.0
-            if hasattr(response.results, 'metadata') and hasattr(response.results.metadata, 'duration'):
-                duration = response.results.metadata.duration
+            duration = response.get("metadata", {}).get("duration") or 0.0
 
             result = {
                 "transcription": transcript,
@@ -636,22 +1201,26 @@ class DeepgramProvider(ASRProvider):
             }
 
             # 詳細モード：話者分離情報を含める
-            if detailed and hasattr(alternatives[0], 'words'):
+            if detailed and "words" in best:
                 result["detailed_mode"] = True
 
-                # 話者ごとに文字起こしを整理
+                # 話者ごとに文字起こしを整理（単語ごとの辞書ではなく項目ごとの配列で保持）
                 speakers_info = {}
-                for word in alternatives[0].words:
-                    if hasattr(word, 'speaker'):
-                        speaker_id = word.speaker
-                        if speaker_id not in speakers_info:
-                            speakers_info[speaker_id] = []
-                        speakers_info[speaker_id].append({
-                            "word": word.word,
-                            "start": word.start,
-                            "end": word.end,
-                            "confidence": word.confidence if hasattr(word, 'confidence') else None
-                        })
+                for word in best["words"]:
+                    speaker_id = word.get("speaker")
+                    if speaker_id is not None:
+                        speaker = speakers_info.get(speaker_id)
+                        if speaker is None:
+                            speaker = speakers_info[speaker_id] = {
+                                "words": [],
+                                "start": [],
+                                "end": [],
+                                "confidence": []
+                            }
+                        speaker["words"].append(word["word"])
+                        speaker["start"].append(word["start"])
+                        speaker["end"].append(word["end"])
+                        speaker["confidence"].append(word.get("confidence"))
 
                 if speakers_info:
                     result["speakers"] = speakers_info
@@ -660,8 +1229,97 @@ class DeepgramProvider(ASRProvider):
             return result
 
         except Exception as e:
-            logger.error(f"❌ Deepgram API呼び出しエラー: {e}")
-            raise HTTPException(status_code=500, detail=f"Deepgram音声処理エラー: {str(e)}")
+            logger.error("❌ Deepgram API呼び出しエラー: %s", e)
+            raise HTTPException(status_code=500, detail=f"Deepgram音声処理エラー: {str(e)}") from e
+
+    @property
+    def supports_url_input(self) -> bool:
+        return ASR_URL_INPUT
+
+    async def transcribe_url(
+        self,
+        audio_url: str,
+        filename: str,
+        detailed: bool = False,
+        high_accuracy: bool = False
+    ) -> Dict[str, Any]:
+        """Deepgram APIにURLを渡して文字起こし（音声の取得はDeepgram側で行う）"""
+        return await self._transcribe_normalized(None, filename, detailed, time.time(), audio_url=audio_url)
+
+    async def _listen_streaming(self, audio_file: BinaryIO, options: Dict[str, str]) -> Dict[str, Any]:
+        """
+        WebSocket APIへPCMをチャンク送信し、確定結果をREST APIと同じ形式に集約する
+
+        Args:
+            audio_file (BinaryIO): 16kHz・モノラル・16bit PCMのWAVファイル
+            options (Dict[str, str]): Deepgram APIオプション
+
+        Returns:
+            Dict[str, Any]: REST API (/v1/listen) のレスポンスと同じ構造の辞書
+        """
+        import websockets  # 遅延インポート
+
+        audio_file.seek(0)
+        wav_reader = wave.open(audio_file, 'rb')
+        frames_per_chunk = DEEPGRAM_STREAM_CHUNK_BYTES // (TARGET_CHANNELS * wav_reader.getsampwidth())
+
+        params = {
+            **options,
+            "encoding": "linear16",
+            "sample_rate": str(TARGET_SAMPLE_RATE),
+            "channels": str(TARGET_CHANNELS),
+        }
+        url = f"{DEEPGRAM_STREAM_URL}?{urlencode(params)}"
+
+        transcripts = []
+        confidences = []
+        words = []
+        duration = 0.0
+
+        async with websockets.connect(
+            url,
+            additional_headers={"Authorization": f"Token {self._api_key}"},
+            max_size=None
+        ) as websocket:
+
+            async def send_audio():
+                for frames in iter(lambda: wav_reader.readframes(frames_per_chunk), b""):
+                    await websocket.send(frames)
+                await websocket.send(json.dumps({"type": "CloseStream"}))
+
+            sender = asyncio.create_task(send_audio())
+            try:
+                # 送信完了後、サーバーが最終結果を返して接続を閉じるまで受信
+                async for message in websocket:
+                    event = json.loads(message)
+                    if event.get("type") == "Results" and event.get("is_final"):
+                        alternative = event["channel"]["alternatives"][0]
+                        if alternative.get("transcript"):
+                            transcripts.append(alternative["transcript"])
+                            confidences.append(alternative.get("confidence", 0.0))
+                            words.extend(alternative.get("words", []))
+                    elif event.get("type") == "Metadata":
+                        duration = event.get("duration", duration)
+                await sender
+            finally:
+                if not sender.done():
+                    sender.cancel()
+
+        if not transcripts:
+            return {}
+
+        return {
+            "metadata": {"duration": duration},
+            "results": {
+                "channels": [{
+                    "alternatives": [{
+                        "transcript": " ".join(transcripts),
+                        "confidence": sum(confidences) / len(confidences),
+                        "words": words,
+                    }]
+                }]
+            }
+        }
 
     @property
     def provider_name(self) -> str:
@@ -692,12 +1350,17 @@ class AiolaProvider(ASRProvider):
         self.client = AiolaClient(access_token=result.access_token)
         self._model = model
 
-        logger.info(f"aiOla Jargonic API初期化完了: model={model}")
+        logger.info("aiOla Jargonic API初期化完了: model=%s", model)
+
+    @property
+    def reusable(self) -> bool:
+        """初期化時に取得したアクセストークンは期限切れになるため、インスタンスを使い回さない"""
+        return False
 
     @retry(
         stop=stop_after_attempt(3),
-        wait=wait_exponential(multiplier=1, min=2, max=10),
-        retry=retry_if_exception_type(Exception)
+        wait=wait_exponential(multiplier=1, min=2, max=10) + wait_random(0, 1),
+        retry=retry_if_exception(_is_transient_error)
     )
     async def transcribe_audio(
         self,
@@ -707,53 +1370,47 @@ class AiolaProvider(ASRProvider):
         high_accuracy: bool = False
     ) -> Dict[str, Any]:
         """aiOla Jargonic APIで音声ファイルを文字起こし（リトライ付き）"""
-        logger.info("=" * 50)
-        logger.info("🚀 aiOla transcribe_audio メソッド開始")
-        logger.info(f"🔍 filename: {filename}")
-        logger.info("=" * 50)
+        logger.debug("🚀 aiOla transcribe_audio メソッド開始: filename=%s", filename)
 
         try:
             # 処理時間計測開始
             start_time = time.time()
 
-            logger.info("📍 ステップ1: audio_fileの位置を先頭に戻す")
             # audio_fileの位置を先頭に戻す
             audio_file.seek(0)
-            logger.info("✅ ステップ1完了")
 
             # デバッグ: audio_fileの状態確認
-            logger.info(f"🔍 audio_file型: {type(audio_file)}")
-            logger.info(f"🔍 audio_file名: {getattr(audio_file, 'name', 'N/A')}")
+            logger.debug("🔍 audio_file型: %s, audio_file名: %s", type(audio_file), getattr(audio_file, 'name', 'N/A'))
 
             # aiOla Jargonic API呼び出し
             # SDKの transcribe_file メソッドを使用
             try:
-                logger.info("🎙️ aiOla API呼び出し開始...")
-                logger.info(f"🔍 呼び出しパラメータ: file={type(audio_file)}, language='ja'")
+                logger.debug("🎙️ aiOla API呼び出し開始: file=%s, language='ja'", type(audio_file))
 
                 transcript = self.client.stt.transcribe_file(
                     file=audio_file,
                     language="ja",  # 日本語
                 )
-                logger.info("✅ aiOla API呼び出し成功")
+                logger.debug("✅ aiOla API呼び出し成功")
             except Exception as api_error:
-                logger.error(f"❌ aiOla API呼び出し失敗: {type(api_error).__name__}: {api_error}")
+                logger.error("❌ aiOla API呼び出し失敗: %s: %s", type(api_error).__name__, api_error)
                 # エラーの詳細を確認
                 if hasattr(api_error, '__dict__'):
-                    logger.error(f"❌ エラー詳細: {api_error.__dict__}")
+                    logger.error("❌ エラー詳細: %s", api_error.__dict__)
                 raise
 
             # 処理時間計測終了
             processing_time = time.time() - start_time
 
-            # デバッグ: レスポンスの構造を確認
-            logger.info(f"🔍 aiOla レスポンス型: {type(transcript)}")
-            logger.info(f"🔍 aiOla レスポンス内容: {transcript}")
+            # デバッグ: レスポンスの構造を確認（レスポンス全体の文字列化はDEBUG時のみ）
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("🔍 aiOla レスポンス型: %s", type(transcript))
+                logger.debug("🔍 aiOla レスポンス内容: %s", transcript)
 
-            if hasattr(transcript, '__dict__'):
-                logger.info(f"🔍 aiOla レスポンス属性: {transcript.__dict__}")
-            elif isinstance(transcript, dict):
-                logger.info(f"🔍 aiOla レスポンスキー: {transcript.keys()}")
+                if hasattr(transcript, '__dict__'):
+                    logger.debug("🔍 aiOla レスポンス属性: %s", transcript.__dict__)
+                elif isinstance(transcript, dict):
+                    logger.debug("🔍 aiOla レスポンスキー: %s", transcript.keys())
 
             # テキスト取得（transcriptの構造に応じて調整が必要な場合がある）
             # aiOla SDKのレスポンス形式に応じて適切に処理
@@ -780,7 +1437,7 @@ class AiolaProvider(ASRProvider):
             else:
                 # 最終手段: 文字列化
                 transcription_text = str(transcript).strip()
-                logger.warning(f"⚠️ aiOla: 予期しないレスポンス形式、文字列化しました")
+                logger.warning("⚠️ aiOla: 予期しないレスポンス形式、文字列化しました")
 
             # 発話なしの判定
             if not transcription_text:
@@ -799,14 +1456,7 @@ class AiolaProvider(ASRProvider):
 
             # aiOlaは信頼度を直接提供しない可能性があるため、テキスト長から推定
             text_length = len(transcription_text)
-            if text_length > 50:
-                confidence = 0.95
-            elif text_length > 20:
-                confidence = 0.90
-            elif text_length > 5:
-                confidence = 0.85
-            else:
-                confidence = 0.75
+            confidence = ESTIMATED_CONFIDENCE_TIERS[bisect.bisect_left(CONFIDENCE_LENGTH_THRESHOLDS, text_length)]
 
             # durationを取得（利用可能な場合）
             duration = 0.0
@@ -825,16 +1475,14 @@ class AiolaProvider(ASRProvider):
 
             # 詳細モード（利用可能な場合）
             if detailed:
+                # SDKのレスポンスオブジェクトはJSONへシリアライズできないため、結果には含めない
                 result["detailed_mode"] = True
-                # aiOla SDKが提供する追加情報があれば含める
-                if hasattr(transcript, '__dict__'):
-                    result["raw_response"] = transcript.__dict__
 
             return result
 
         except Exception as e:
-            logger.error(f"❌ aiOla Jargonic API呼び出しエラー: {e}")
-            raise HTTPException(status_code=500, detail=f"aiOla音声処理エラー: {str(e)}")
+            logger.error("❌ aiOla Jargonic API呼び出しエラー: %s", e)
+            raise HTTPException(status_code=500, detail=f"aiOla音声処理エラー: {str(e)}") from e
 
     @property
     def provider_name(self) -> str:
@@ -848,6 +1496,17 @@ class AiolaProvider(ASRProvider):
 class ASRFactory:
     """ASRプロバイダーのファクトリークラス"""
 
+    # プロバイダーごとのデフォルトモデル
+    DEFAULT_MODELS: Dict[str, str] = {
+        "azure": "ja-JP",
+        "groq": "whisper-large-v3-turbo",
+        "deepgram": "nova-3",
+        "aiola": "jargonic-v2",
+    }
+
+    # 生成済みインスタンス（既知のプロバイダー/モデルごとに1つを使い回す）
+    _instances: Dict[Tuple[str, str], ASRProvider] = {}
+
     @staticmethod
     def create(provider: str, model: Optional[str] = None) -> ASRProvider:
         """
@@ -864,22 +1523,19 @@ class ASRFactory:
             ValueError: 未知のプロバイダー名が指定された場合
         """
         provider = provider.lower()
+        model = model or ASRFactory.DEFAULT_MODELS.get(provider)
 
         if provider == "azure":
-            default_model = "ja-JP"
-            return AzureProvider(model or default_model)
+            return AzureProvider(model)
 
         elif provider == "groq":
-            default_model = "whisper-large-v3-turbo"
-            return GroqProvider(model or default_model)
+            return GroqProvider(model)
 
         elif provider == "deepgram":
-            default_model = "nova-3"
-            return DeepgramProvider(model or default_model)
+            return DeepgramProvider(model)
 
         elif provider == "aiola":
-            default_model = "jargonic-v2"
-            return AiolaProvider(model or default_model)
+            return AiolaProvider(model)
 
         else:
             raise ValueError(
@@ -887,6 +1543,37 @@ class ASRFactory:
                 f"対応プロバイダー: azure, groq, deepgram, aiola"
             )
 
+    @classmethod
+    def get(cls, provider: str, model: Optional[str] = None) -> ASRProvider:
+        """
+        指定されたプロバイダーとモデルのインスタンスを取得（初回のみ生成）
+
+        SpeechConfigやAPIクライアント設定の再構築をリクエストごとに行わないよう、
+        生成済みのインスタンスを再利用する。リクエストで任意のモデル名を指定できるため、
+        再利用するのはデフォルトモデルと現在の設定（CURRENT_PROVIDER/CURRENT_MODEL）のみとし、
+        それ以外のモデルやreusableがFalseのプロバイダーは毎回生成する
+
+        Args:
+            provider (str): プロバイダー名 ("azure", "groq", "deepgram", "aiola")
+            model (str, optional): モデル名。Noneの場合はデフォルトを使用
+
+        Returns:
+            ASRProvider: 指定されたプロバイダーのインスタンス
+        """
+        provider = provider.lower()
+        key = (provider, model or cls.DEFAULT_MODELS.get(provider, ""))
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = cls.create(provider, model)
+            if key in cls._cacheable_keys() and instance.reusable:
+                cls._instances[key] = instance
+        return instance
+
+    @classmethod
+    def _cacheable_keys(cls) -> Set[Tuple[str, str]]:
+        """インスタンスを使い回す既知のプロバイダー/モデルの組み合わせ"""
+        return {*cls.DEFAULT_MODELS.items(), (CURRENT_PROVIDER, CURRENT_MODEL)}
+
     @staticmethod
     def get_current() -> ASRProvider:
         """
@@ -897,8 +1584,10 @@ class ASRFactory:
         Returns:
             ASRProvider: 現在のプロバイダーインスタンス
         """
-        logger.info(f"🎙️ 使用ASRプロバイダー: {CURRENT_PROVIDER}/{CURRENT_MODEL}")
-        return ASRFactory.create(CURRENT_PROVIDER, CURRENT_MODEL)
+        key = (CURRENT_PROVIDER, CURRENT_MODEL)
+        if key not in ASRFactory._instances:
+            logger.info("🎙️ 使用ASRプロバイダー: %s/%s", CURRENT_PROVIDER, CURRENT_MODEL)
+        return ASRFactory.get(CURRENT_PROVIDER, CURRENT_MODEL)
 
 
 # 便利な関数：現在のASRプロバイダーを取得
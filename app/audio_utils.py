@@ -0,0 +1,269 @@
+"""
+音声データの前処理ユーティリティ
+
+ASRプロバイダーへ送信する前の音声フォーマット判定・変換を行う。
+"""
+
+import asyncio
+import io
+import math
+import operator
+import os
+import shutil
+import struct
+import sys
+import wave
+from array import array
+from typing import AsyncIterator, BinaryIO, Tuple
+import logging
+
+logger = logging.getLogger(__name__)
+
+# ASRプロバイダーへ送信する音声の標準フォーマット（16kHz / モノラル / 16bit PCM）
+TARGET_SAMPLE_RATE = 16000
+TARGET_CHANNELS = 1
+TARGET_SAMPLE_WIDTH = 2
+
+# アップロード時に一度に読み込むバイト数
+UPLOAD_CHUNK_BYTES = 65536
+
+# フォーマット判定に必要なWAVヘッダーのバイト数
+WAV_HEADER_BYTES = 44
+
+# 無音判定：フレーム内の最大振幅がこの値未満なら無音フレームとみなす（0で無音判定を無効化、既定は無効）
+# 小さな声の発話を無音と誤判定しやすいため、録音環境の無音レベルを確認してから設定する
+SILENCE_PEAK_THRESHOLD = int(os.getenv("SILENCE_PEAK_THRESHOLD", "0"))
+
+# 無音判定：音声全体のRMS（16bit PCM）がこの値未満なら無音とみなす（0で無効化、既定は無効）
+SILENCE_RMS_THRESHOLD = float(os.getenv("SILENCE_RMS_THRESHOLD", "0"))
+
+# 無音判定：無音フレームの割合がこの値以上なら音声全体を無音とみなす
+SILENCE_FRAME_RATIO = 0.95
+
+# 無音判定の1フレームの長さ（ミリ秒）
+SILENCE_FRAME_MS = 30
+
+# 無音判定：この長さ（ミリ秒）未満の音声は発話なしとみなす（0で無効化）
+MIN_AUDIO_DURATION_MS = int(os.getenv("MIN_AUDIO_DURATION_MS", "300"))
+
+
+def is_pcm16_mono_16k(audio_data: bytes) -> bool:
+    """WAVヘッダーを確認し、既に16kHz・モノラル・16bit PCMかを判定"""
+    if len(audio_data) < 36 or audio_data[:4] != b"RIFF" or audio_data[8:16] != b"WAVEfmt ":
+        return False
+
+    audio_format, channels, sample_rate = struct.unpack_from("<HHI", audio_data, 20)
+    bits_per_sample = struct.unpack_from("<H", audio_data, 34)[0]
+    return (
+        audio_format == 1
+        and channels == TARGET_CHANNELS
+        and sample_rate == TARGET_SAMPLE_RATE
+        and bits_per_sample == TARGET_SAMPLE_WIDTH * 8
+    )
+
+
+def is_pcm_wav(audio_data: bytes) -> bool:
+    """WAVヘッダーを確認し、非圧縮PCMのWAVか（サンプルレート・チャンネル数は問わない）を判定"""
+    return (
+        len(audio_data) >= 22
+        and audio_data[:4] == b"RIFF"
+        and audio_data[8:16] == b"WAVEfmt "
+        and struct.unpack_from("<H", audio_data, 20)[0] == 1
+    )
+
+
+def read_header(audio_file: BinaryIO) -> bytes:
+    """ファイル先頭のヘッダーを読み取り、読み込み位置を先頭に戻す"""
+    audio_file.seek(0)
+    header = audio_file.read(WAV_HEADER_BYTES)
+    audio_file.seek(0)
+    return header
+
+
+def get_file_size(audio_file: BinaryIO) -> int:
+    """ファイルサイズを取得し、読み込み位置を先頭に戻す"""
+    size = audio_file.seek(0, os.SEEK_END)
+    audio_file.seek(0)
+    return size
+
+
+async def iter_file_chunks(audio_file: BinaryIO, chunk_size: int = UPLOAD_CHUNK_BYTES) -> AsyncIterator[bytes]:
+    """ファイルを先頭から一定サイズずつ読み出す（全体をメモリに載せずにアップロードする）"""
+    audio_file.seek(0)
+    for chunk in iter(lambda: audio_file.read(chunk_size), b""):
+        yield chunk
+
+
+class _HashingReader:
+    """読み込んだバイト列を順にハッシュへ反映する読み取り専用ラッパー（シーク不可として扱わせる）"""
+
+    def __init__(self, audio_file: BinaryIO, digest):
+        self._file = audio_file
+        self._digest = digest
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._file.read(size)
+        self._digest.update(data)
+        return data
+
+
+class UploadReader:
+    """
+    fileno()を公開しない読み取り専用ラッパー（httpxのmultipart送信用）
+
+    httpxはfileno()でファイル長を取得するが、SpooledTemporaryFileはfileno()の呼び出しで
+    メモリ上のデータを一時ファイルへ書き出してしまうため、シークで長さを取得させる
+    """
+
+    def __init__(self, audio_file: BinaryIO):
+        self._file = audio_file
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def seek(self, offset: int, whence: int = os.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+
+def update_digest(audio_file: BinaryIO, digest) -> None:
+    """ファイル全体をハッシュへ反映し、読み込み位置を先頭に戻す"""
+    audio_file.seek(0)
+    for chunk in iter(lambda: audio_file.read(UPLOAD_CHUNK_BYTES), b""):
+        digest.update(chunk)
+    audio_file.seek(0)
+
+
+def is_silent(audio_file: BinaryIO, digest=None) -> bool:
+    """
+    16kHz・モノラル・16bit PCMのWAVがほぼ無音（または短すぎる）かを振幅で簡易判定する
+
+    SILENCE_PEAK_THRESHOLD（フレームごとの最大振幅）とSILENCE_RMS_THRESHOLD（音声全体のRMS）の
+    どちらかで無音と判定された場合に無音とする（いずれも0で無効）。
+
+    それ以外のフォーマットは判定せずFalseを返す（ASRプロバイダー側で処理）。
+    digestを指定した場合は、判定と同じ読み込みでファイル全体のハッシュも計算する。
+
+    Args:
+        audio_file (BinaryIO): 音声ファイル（シーク可能であること）
+        digest: ファイル内容を反映するhashlibのハッシュオブジェクト（任意）
+
+    Returns:
+        bool: 無音と判定された場合True
+    """
+    reader = _HashingReader(audio_file, digest) if digest is not None else audio_file
+
+    try:
+        check_peak = SILENCE_PEAK_THRESHOLD > 0
+        check_rms = SILENCE_RMS_THRESHOLD > 0
+        if (not check_peak and not check_rms and MIN_AUDIO_DURATION_MS <= 0) or not is_pcm16_mono_16k(read_header(audio_file)):
+            return False
+
+        with wave.open(reader, "rb") as wav_reader:
+            # 短すぎる音声は認識しても結果が得られないため、振幅を見ずに無音扱いとする（振幅判定の有効・無効によらない）
+            if wav_reader.getnframes() * 1000 < TARGET_SAMPLE_RATE * MIN_AUDIO_DURATION_MS:
+                return True
+
+            if not check_peak and not check_rms:
+                return False
+
+            frames_per_block = TARGET_SAMPLE_RATE * SILENCE_FRAME_MS // 1000
+            total_blocks = wav_reader.getnframes() // frames_per_block
+            if total_blocks == 0:
+                return False
+
+            # 発話フレームがこの数を超えた時点で無音ではないと確定する（RMS判定時は全体を読むため打ち切らない）
+            max_voiced_blocks = total_blocks * (1 - SILENCE_FRAME_RATIO)
+            voiced_blocks = 0
+            sum_of_squares = 0
+
+            for _ in range(total_blocks):
+                samples = array("h", wav_reader.readframes(frames_per_block))
+                if sys.byteorder == "big":
+                    samples.byteswap()
+                if check_rms:
+                    sum_of_squares += sum(map(operator.mul, samples, samples))
+                if check_peak and (max(samples) >= SILENCE_PEAK_THRESHOLD or -min(samples) >= SILENCE_PEAK_THRESHOLD):
+                    voiced_blocks += 1
+                    if voiced_blocks > max_voiced_blocks and not check_rms:
+                        return False
+
+            if check_rms and math.sqrt(sum_of_squares / (total_blocks * frames_per_block)) < SILENCE_RMS_THRESHOLD:
+                return True
+            return check_peak and voiced_blocks <= max_voiced_blocks
+
+    except (wave.Error, EOFError):
+        return False
+
+    finally:
+        # ハッシュ計算中の場合は、判定で読まなかった残りも読み切る
+        if digest is not None:
+            for _ in iter(lambda: reader.read(UPLOAD_CHUNK_BYTES), b""):
+                pass
+        audio_file.seek(0)
+
+
+def pcm_to_wav(pcm_data: bytes) -> bytes:
+    """標準フォーマットの生PCMデータにWAVヘッダーを付与"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_writer:
+        wav_writer.setnchannels(TARGET_CHANNELS)
+        wav_writer.setsampwidth(TARGET_SAMPLE_WIDTH)
+        wav_writer.setframerate(TARGET_SAMPLE_RATE)
+        wav_writer.writeframes(pcm_data)
+    return buffer.getvalue()
+
+
+async def normalize_audio(audio_file: BinaryIO, filename: str) -> Tuple[BinaryIO, str]:
+    """
+    音声を16kHz・モノラル・16bit PCMのWAVへ変換する
+
+    既に標準フォーマットの場合や、ffmpegが利用できない・変換に失敗した場合は
+    元のファイルをそのまま（先頭位置で）返すため、呼び出し側はストリーミング送信できる。
+
+    Args:
+        audio_file (BinaryIO): 音声ファイル（シーク可能であること）
+        filename (str): 元のファイル名
+
+    Returns:
+        Tuple[BinaryIO, str]: 送信する音声ファイルとファイル名
+    """
+    if is_pcm16_mono_16k(read_header(audio_file)) or shutil.which("ffmpeg") is None:
+        return audio_file, filename
+
+    process = await asyncio.create_subprocess_exec(
+        "ffmpeg", "-hide_banner", "-loglevel", "error",
+        "-i", "pipe:0",
+        "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ac", str(TARGET_CHANNELS), "-ar", str(TARGET_SAMPLE_RATE),
+        "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE
+    )
+    async def feed_input():
+        # 元ファイル全体をメモリに読み込まず、チャンク単位でffmpegへ渡す
+        try:
+            async for chunk in iter_file_chunks(audio_file):
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # ffmpegが先に終了した場合（エラーはreturncodeで判定）
+        finally:
+            process.stdin.close()
+
+    _, pcm_data, stderr = await asyncio.gather(
+        feed_input(),
+        process.stdout.read(),
+        process.stderr.read()
+    )
+    await process.wait()
+    audio_file.seek(0)
+
+    if process.returncode != 0 or not pcm_data:
+        logger.warning("⚠️ 音声の前処理に失敗したため元データを送信します: %s - %s", filename, stderr.decode(errors='ignore').strip())
+        return audio_file, filename
+
+    return io.BytesIO(pcm_to_wav(pcm_data)), os.path.splitext(filename)[0] + ".wav"
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, model_validator
-from typing import Optional, List
+from pydantic import BaseModel, Discriminator, Tag
+from typing import Annotated, Any, Dict, Optional, List, Union
 
 class TranscriptionResponse(BaseModel):
     transcription: str
@@ -12,26 +12,59 @@ class TranscriptionResponse(BaseModel):
     asr_provider: Optional[str] = None  # 使用したプロバイダー名
     asr_model: Optional[str] = None  # 使用したモデル名
 
-class FetchAndTranscribeRequest(BaseModel):
+class SpeakerWords(BaseModel):
+    # 話者ごとの単語情報（単語ごとの辞書ではなく、項目ごとの配列で保持。同じ添字が同じ単語）
+    words: List[str]
+    start: List[float]
+    end: List[float]
+    confidence: List[Optional[float]]
+
+class DetailedTranscriptionResponse(TranscriptionResponse):
+    # 詳細モード（detailed=True）のレスポンス
+    detailed_mode: bool = True
+    segments: Optional[List[Dict[str, Any]]] = None  # Groq: Whisperのセグメント情報
+    speakers: Optional[Dict[int, SpeakerWords]] = None  # Deepgram: 話者ID → 話者ごとの単語情報
+    speaker_count: Optional[int] = None  # Deepgram: 検出された話者数
+
+def _request_kind(value: Any) -> Optional[str]:
+    """リクエストの形式を判定（device_id + local_date を優先）"""
+    if isinstance(value, dict):
+        get = value.get
+    else:
+        get = lambda name: getattr(value, name, None)
+
+    if get("device_id") and get("local_date"):
+        return "device_date"
+    if get("file_paths"):
+        return "file_paths"
+    return None
+
+class DeviceDateRequest(BaseModel):
     # 新しいインターフェース
-    device_id: Optional[str] = None  # デバイスID
-    local_date: Optional[str] = None  # 日付（YYYY-MM-DD形式）
+    device_id: str  # デバイスID
+    local_date: str  # 日付（YYYY-MM-DD形式）
     time_blocks: Optional[List[str]] = None  # 特定の時間ブロック（指定しない場合は全時間帯）
-    
+    force_reprocess: bool = False  # Trueの場合は処理済み（completed）のファイルも再処理
+
+    # 共通パラメータ
+    model: str = "azure"  # azureモデルのみサポート
+
+class FilePathsRequest(BaseModel):
     # 既存のインターフェース（後方互換性）
-    file_paths: Optional[List[str]] = None  # 直接file_pathを指定
-    
+    file_paths: List[str]  # 直接file_pathを指定
+
     # 共通パラメータ
     model: str = "azure"  # azureモデルのみサポート
-    
-    @model_validator(mode='after')
-    def validate_request(self):
-        # どちらかのインターフェースが必要
-        if self.device_id and self.local_date:
-            # 新インターフェース
-            return self
-        elif self.file_paths:
-            # 既存インターフェース
-            return self
-        else:
-            raise ValueError("device_id + local_date または file_paths のどちらかを指定してください") 
\ No newline at end of file
+
+# どちらかのインターフェースが必要（判定はpydanticのunion振り分けで行う）
+FetchAndTranscribeRequest = Annotated[
+    Union[
+        Annotated[DeviceDateRequest, Tag("device_date")],
+        Annotated[FilePathsRequest, Tag("file_paths")],
+    ],
+    Discriminator(
+        _request_kind,
+        custom_error_type="invalid_request",
+        custom_error_message="device_id + local_date または file_paths のどちらかを指定してください"
+    )
+]
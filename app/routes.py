@@ -1,8 +1,11 @@
-from fastapi import APIRouter, File, UploadFile, HTTPException, Query
-from app.models import TranscriptionResponse, FetchAndTranscribeRequest
+from fastapi import APIRouter, Body, File, UploadFile, HTTPException, Query
+from fastapi.responses import ORJSONResponse
+from app.models import TranscriptionResponse, DetailedTranscriptionResponse, FetchAndTranscribeRequest
 from app.services import transcriber_service
 from app.asr_providers import ASRFactory, CURRENT_PROVIDER, CURRENT_MODEL
-from typing import Optional
+from app.audio_utils import get_file_size
+from typing import Annotated, Optional, Union
+import os
 import time
 import logging
 
@@ -11,13 +14,25 @@ logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
-@router.post("/analyze/azure", response_model=TranscriptionResponse)
+# アップロードを受け付ける音声ファイル形式
+ALLOWED_EXTENSIONS = frozenset({'.wav', '.mp3', '.m4a'})
+UNSUPPORTED_EXTENSION_DETAIL = "サポートされていないファイル形式です。対応形式: .wav, .mp3, .m4a"
+
+# アップロードの最大サイズ
+MAX_UPLOAD_BYTES = 25 * 1024 * 1024
+
+@router.post(
+    "/analyze/azure",
+    response_model=Union[DetailedTranscriptionResponse, TranscriptionResponse],
+    response_class=ORJSONResponse
+)
 async def analyze_audio(
     file: UploadFile = File(...),
     detailed: bool = Query(False, description="詳細な結果（信頼度、統計情報）を取得"),
     high_accuracy: bool = Query(False, description="高精度モード（時間がかかりますが精度が向上）"),
     provider: Optional[str] = Query(None, description="ASRプロバイダー指定（azure, groq, deepgram, aiola）※テスト用"),
-    model: Optional[str] = Query(None, description="モデル指定※テスト用")
+    model: Optional[str] = Query(None, description="モデル指定※テスト用"),
+    no_cache: bool = Query(False, description="文字起こし結果キャッシュを使用しない")
 ):
     """ASRプロバイダーを使用して音声ファイルを文字起こしする
 
@@ -25,46 +40,48 @@ async def analyze_audio(
     """
 
     # ファイル形式チェック
-    allowed_extensions = ['.wav', '.mp3', '.m4a']
-    file_extension = None
-
     if file.filename:
-        file_extension = '.' + file.filename.split('.')[-1].lower()
-        if file_extension not in allowed_extensions:
-            raise HTTPException(
-                status_code=400,
-                detail=f"サポートされていないファイル形式です。対応形式: {', '.join(allowed_extensions)}"
-            )
+        file_extension = os.path.splitext(file.filename)[1].lower()
+        if file_extension not in ALLOWED_EXTENSIONS:
+            raise HTTPException(status_code=400, detail=UNSUPPORTED_EXTENSION_DETAIL)
     else:
         raise HTTPException(status_code=400, detail="ファイル名が指定されていません")
 
-    # ファイルサイズチェック（25MB制限）
-    if file.size and file.size > 25 * 1024 * 1024:
+    # ファイルサイズチェック（25MB制限、申告値ではなく受信済みの実サイズで判定）
+    if get_file_size(file.file) > MAX_UPLOAD_BYTES:
         raise HTTPException(status_code=400, detail="ファイルサイズが25MBを超えています")
 
     try:
         # プロバイダーの選択（動的またはデフォルト）
         if provider:
-            # クエリパラメータで指定された場合は動的に生成
-            logger.info(f"🔄 動的プロバイダー切り替え: {provider}/{model or 'default'}")
-            asr_provider = ASRFactory.create(provider, model)
+            # クエリパラメータで指定された場合は動的に取得（初回のみ生成）
+            logger.info("🔄 動的プロバイダー切り替え: %s/%s", provider, model or 'default')
+            asr_provider = ASRFactory.get(provider, model)
         else:
             # デフォルトプロバイダーを使用
             asr_provider = transcriber_service.asr_provider
 
         # 音声文字起こし実行
-        result = await asr_provider.transcribe_audio(
+        result = await asr_provider.transcribe_audio_cached(
             file.file,
             file.filename,
             detailed=detailed,
-            high_accuracy=high_accuracy
+            high_accuracy=high_accuracy,
+            no_cache=no_cache
         )
 
         # プロバイダー情報をレスポンスに追加
         result['asr_provider'] = asr_provider.provider_name
         result['asr_model'] = asr_provider.model_name
 
-        return TranscriptionResponse(**result)
+        # 詳細モードは話者情報などプロバイダー由来の構造を含むため、レスポンスモデルで検証して内部用の項目を除く
+        if detailed:
+            response = DetailedTranscriptionResponse.model_validate(result)
+            return ORJSONResponse(response.model_dump())
+
+        # 結果はプロバイダーが生成した信頼できる辞書のため、バリデーションを省略して直接シリアライズ
+        response = TranscriptionResponse.model_construct(**result)
+        return ORJSONResponse(response.model_dump())
 
     except HTTPException:
         raise
@@ -72,7 +89,7 @@ async def analyze_audio(
         raise HTTPException(status_code=500, detail=f"予期しないエラーが発生しました: {str(e)}")
 
 @router.post("/fetch-and-transcribe")
-async def fetch_and_transcribe(request: FetchAndTranscribeRequest):
+async def fetch_and_transcribe(request: Annotated[FetchAndTranscribeRequest, Body()]):
     """WatchMeシステムのメイン処理エンドポイント（マルチプロバイダー対応）"""
     start_time = time.time()
 
@@ -90,5 +107,5 @@ async def fetch_and_transcribe(request: FetchAndTranscribeRequest):
     except HTTPException:
         raise
     except Exception as e:
-        logger.error(f"fetch_and_transcribe エラー: {str(e)}")
+        logger.error("fetch_and_transcribe エラー: %s", e)
         raise HTTPException(status_code=500, detail=f"予期しないエラーが発生しました: {str(e)}") 
\ No newline at end of file
@@ -1,14 +1,22 @@
+import asyncio
+import functools
 import os
+import random
+import shutil
 import tempfile
 import time
+from concurrent.futures import ThreadPoolExecutor
 from fastapi import HTTPException
-from typing import BinaryIO, Dict, Any, List, Set
+from typing import BinaryIO, Dict, Any, List, Optional, Set, Tuple
 import boto3
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
 from botocore.exceptions import ClientError
 from supabase import create_client, Client
 from dotenv import load_dotenv
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
+import pytz
 from app.asr_providers import get_current_asr, CURRENT_PROVIDER, CURRENT_MODEL
 
 # 環境変数読み込み
@@ -17,11 +25,65 @@ load_dotenv()
 # ロギング設定
 logger = logging.getLogger(__name__)
 
+# fetch_and_transcribe_filesで同時に処理するファイル数（ASRプロバイダーのレート制限に合わせて調整）
+ASR_CONCURRENCY = int(os.getenv("ASR_CONCURRENCY", "8"))
+
+# S3ダウンロード・Supabase保存（同期クライアント）用のスレッドプール
+_io_executor = ThreadPoolExecutor(max_workers=ASR_CONCURRENCY, thread_name_prefix="transcriber-io")
+
+# Azure利用上限の判定に使用するタイムゾーン（日本時間9:00にリセット）
+JST = pytz.timezone('Asia/Tokyo')
+
+# プロバイダーへ渡すS3署名付きURLの有効期限（秒）
+PRESIGNED_URL_EXPIRES_SECONDS = 3600
+
+# S3からのダウンロード先（RAM上のtmpfsが使える場合はディスクI/Oを避ける、ASR_TMPDIRで変更可能）
+TMPFS_DIR = os.getenv("ASR_TMPDIR") or ("/dev/shm" if os.path.ismount("/dev/shm") else None)
+
+# tmpfsの空き容量がこの値を下回る場合は通常の一時ディレクトリを使用
+TMPFS_MIN_FREE_BYTES = 32 * 1024 * 1024
+
+# Supabaseへの一括書き込み1回あたりの最大件数（PostgRESTのリクエストサイズ制限対策）
+SUPABASE_BATCH_SIZE = 500
+
+# 再処理しないaudio_filesのステータス（skipped_silentは無音判定でASRを省略したファイル）
+DONE_STATUSES = frozenset({'completed', 'skipped_silent'})
+
+# file_pathのIN句フィルタ1回あたりの最大件数（フィルタはURLに含まれるため、約8KBのURL長制限に収まる件数にする）
+SUPABASE_IN_FILTER_SIZE = 100
+
+# audio_filesのステータス更新をPostgres関数（RPC）で行う（READMEの関数定義が必要、既定は無効）
+# RPCはJSONボディでfile_pathを渡すため、IN句のURL長制限を受けずステータスごとに1回の往復で済む
+SUPABASE_STATUS_RPC = os.getenv("SUPABASE_STATUS_RPC", "false").lower() == "true"
+
+# S3: このサイズを超えるファイルは分割して並列ダウンロード（分割サイズも同じ）
+S3_MULTIPART_BYTES = int(os.getenv("S3_MULTIPART_BYTES", str(8 * 1024 * 1024)))
+
+# S3: 1ファイルあたりの並列ダウンロード数
+S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10"))
+
+# S3: リクエストの最大試行回数（初回を含む）
+S3_MAX_ATTEMPTS = 5
+
+# S3: 接続プールの最大接続数（既定の10では並列ダウンロード時に接続の取り合い・再接続が発生する）
+S3_MAX_POOL_CONNECTIONS = int(os.getenv("S3_MAX_POOL_CONNECTIONS", str(ASR_CONCURRENCY * S3_MAX_CONCURRENCY)))
+
+# S3からのダウンロードをメモリ上に保持する最大サイズ（超えた分は一時ファイルへ退避）
+SPOOL_MAX_BYTES = int(os.getenv("ASR_TMPFILE_MAX_MEMORY", str(32 * 1024 * 1024)))
+
+
+def get_temp_dir():
+    """一時ファイルの作成先ディレクトリを返す（Noneの場合は既定の一時ディレクトリ）"""
+    if TMPFS_DIR and shutil.disk_usage(TMPFS_DIR).free >= TMPFS_MIN_FREE_BYTES:
+        return TMPFS_DIR
+    return None
+
+
 class TranscriberService:
     def __init__(self):
         # ASRプロバイダーを取得
         self.asr_provider = get_current_asr()
-        logger.info(f"ASRプロバイダー初期化完了: {self.asr_provider.provider_name}/{self.asr_provider.model_name}")
+        logger.info("ASRプロバイダー初期化完了: %s/%s", self.asr_provider.provider_name, self.asr_provider.model_name)
 
         # Supabase設定
         supabase_url = os.getenv('SUPABASE_URL')
@@ -31,7 +93,7 @@ class TranscriberService:
             raise ValueError("SUPABASE_URLおよびSUPABASE_KEYが設定されていません")
 
         self.supabase: Client = create_client(supabase_url, supabase_key)
-        logger.info(f"Supabase接続設定完了: {supabase_url}")
+        logger.info("Supabase接続設定完了: %s", supabase_url)
 
         # AWS S3設定
         aws_access_key_id = os.getenv('AWS_ACCESS_KEY_ID')
@@ -46,25 +108,43 @@ class TranscriberService:
             's3',
             aws_access_key_id=aws_access_key_id,
             aws_secret_access_key=aws_secret_access_key,
-            region_name=aws_region
+            region_name=aws_region,
+            # 一時的な5xx・スロットリングは指数バックオフ（ジッター付き）でリトライ
+            config=Config(
+                # 並列処理するファイル数 × ファイルごとの分割ダウンロード数まで接続を再利用できるようにする
+                max_pool_connections=S3_MAX_POOL_CONNECTIONS,
+                retries={'max_attempts': S3_MAX_ATTEMPTS, 'mode': 'adaptive'},
+                tcp_keepalive=True,
+                connect_timeout=5,
+                read_timeout=60
+            )
+        )
+        logger.info("AWS S3接続設定完了: バケット=%s, リージョン=%s", self.s3_bucket_name, aws_region)
+
+        # 大きなファイルはバイト範囲を分割して並列ダウンロード
+        self.s3_transfer_config = TransferConfig(
+            multipart_threshold=S3_MULTIPART_BYTES,
+            multipart_chunksize=S3_MULTIPART_BYTES,
+            max_concurrency=S3_MAX_CONCURRENCY,
+            use_threads=True
         )
-        logger.info(f"AWS S3接続設定完了: バケット={self.s3_bucket_name}, リージョン={aws_region}")
+
     async def fetch_and_transcribe_files(self, request):
         """S3から音声ファイルを取得してASRプロバイダーで文字起こし実行"""
-        from app.models import FetchAndTranscribeRequest  # 循環インポート回避
+        from app.models import DeviceDateRequest  # 循環インポート回避
         
         start_time = time.time()
+        already_completed = 0
         
         # リクエストの処理
-        if request.device_id and request.local_date:
+        if isinstance(request, DeviceDateRequest):
             # 新しいインターフェース: device_id + local_date + time_blocks
-            logger.info(f"新インターフェース使用: device_id={request.device_id}, local_date={request.local_date}, time_blocks={request.time_blocks}")
+            logger.info("新インターフェース使用: device_id=%s, local_date=%s, time_blocks=%s", request.device_id, request.local_date, request.time_blocks)
             
             # audio_filesテーブルから該当するファイルを検索
-            # すべてのファイルを取得（ステータスに関係なく処理可能にする）
-            # 明示的に処理を指定した場合は、completedも含めて再処理できるようにする
+            # すべてのファイルを取得し、処理済み（completed・skipped_silent）はforce_reprocess指定時のみ再処理する
             query = self.supabase.table('audio_files') \
-                .select('file_path, device_id, recorded_at, local_date, time_block, transcriptions_status') \
+                .select('file_path, device_id, recorded_at, local_date, local_time, transcriptions_status') \
                 .eq('device_id', request.device_id) \
                 .eq('local_date', request.local_date)
             
@@ -72,347 +152,451 @@ class TranscriberService:
             if request.time_blocks:
                 query = query.in_('time_block', request.time_blocks)
             
-            # クエリ実行
+            # クエリ実行（同期クライアントのためスレッドプールで実行）
             try:
-                response = query.execute()
+                response = await asyncio.get_running_loop().run_in_executor(_io_executor, query.execute)
                 audio_files = response.data
-                logger.info(f"audio_filesテーブルから{len(audio_files)}件のファイルを取得")
+                logger.info("audio_filesテーブルから%d件のファイルを取得", len(audio_files))
             except Exception as e:
-                logger.error(f"audio_filesテーブルのクエリエラー: {str(e)}")
+                logger.error("audio_filesテーブルのクエリエラー: %s", e)
                 raise HTTPException(status_code=500, detail=f"データベースクエリエラー: {str(e)}")
             
+            # 処理済みのファイルは再処理しない（S3ダウンロード・ASR・Supabase書き込みを省略）
+            if not request.force_reprocess:
+                pending_files = [file for file in audio_files if file.get('transcriptions_status') not in DONE_STATUSES]
+                already_completed = len(audio_files) - len(pending_files)
+                audio_files = pending_files
+                if already_completed:
+                    logger.info("処理済みのためスキップ: %d件（再処理する場合はforce_reprocessを指定）", already_completed)
+
             # file_pathsリストを構築
             file_paths = [file['file_path'] for file in audio_files]
-            
-            if not file_paths:
-                execution_time = time.time() - start_time
-                return {
-                    "status": "success",
-                    "summary": {
-                        "total_files": 0,
-                        "already_completed": 0,
-                        "pending_processed": 0,
-                        "errors": 0
-                    },
-                    "device_id": request.device_id,
-                    "local_date": request.local_date,
-                    "time_blocks_requested": request.time_blocks,
-                    "processed_time_blocks": [],
-                    "execution_time_seconds": round(execution_time, 1),
-                    "message": "処理対象のファイルがありません（全て処理済みまたは該当なし）"
-                }
         
         elif request.file_paths:
             # 既存のインターフェース: file_pathsを直接指定
-            logger.info(f"既存インターフェース使用: file_paths={len(request.file_paths)}件")
+            logger.info("既存インターフェース使用: file_paths=%d件", len(request.file_paths))
             file_paths = request.file_paths
             audio_files = None  # 後方互換性のため
         
         else:
-            # ここに来ることはない（model_validatorで検証済み）
+            # ここに来ることはない（リクエストモデルの振り分けで検証済み）
             raise HTTPException(
                 status_code=400,
                 detail="device_id + local_dateまたはfile_pathsのどちらかを指定してください"
             )
         
         if not file_paths:
-            # file_pathsが空の場合は、処理対象なしとして正常終了
-            execution_time = time.time() - start_time
-            
-            return {
-                "status": "success",
-                "summary": {
-                    "total_files": 0,
-                    "already_completed": 0,
-                    "pending_processed": 0,
-                    "errors": 0
-                },
-                "processed_files": [],
-                "execution_time_seconds": round(execution_time, 1),
-                "message": "処理対象のファイルがありません"
-            }
+            # 処理対象なしとして正常終了
+            return self._empty_response(request, time.time() - start_time, already_completed)
         
-        logger.info(f"処理対象: {len(file_paths)}件のファイル")
+        logger.info("処理対象: %d件のファイル", len(file_paths))
         
         # 処理対象ファイルの情報を構築
-        files_to_process = []
-        device_ids = set()
-        dates = set()
-        
-        # 新インターフェースの場合
+        # 新インターフェースの場合は、取得済みのaudio_filesの行（必要な列のみselect済み）をそのまま使用
         if audio_files:
-            for audio_file in audio_files:
-                files_to_process.append({
-                    'file_path': audio_file['file_path'],
-                    'device_id': audio_file['device_id'],
-                    'recorded_at': audio_file['recorded_at']
-                })
-                device_ids.add(audio_file['device_id'])
-                dates.add(audio_file.get('local_date', ''))
+            files_to_process = audio_files
         
         # 既存インターフェースの場合（file_pathから情報を抽出）
         else:
-            for file_path in file_paths:
-                # audio_filesテーブルからdevice_idとrecorded_atを取得
+            # audio_filesテーブルからdevice_idとrecorded_atをまとめて取得（ファイルごとの往復を削減）
+            records = {}
+            for offset in range(0, len(file_paths), SUPABASE_IN_FILTER_SIZE):
+                chunk = file_paths[offset:offset + SUPABASE_IN_FILTER_SIZE]
                 try:
-                    audio_file_response = self.supabase.table('audio_files') \
-                        .select('device_id, recorded_at') \
-                        .eq('file_path', file_path) \
-                        .single() \
-                        .execute()
-
-                    if audio_file_response.data:
-                        device_id = audio_file_response.data['device_id']
-                        recorded_at = audio_file_response.data['recorded_at']
-
-                        files_to_process.append({
-                            'file_path': file_path,
-                            'device_id': device_id,
-                            'recorded_at': recorded_at
-                        })
-                        device_ids.add(device_id)
-                    else:
-                        logger.warning(f"audio_filesテーブルにレコードが見つかりません: {file_path}")
-
+                    query = self.supabase.table('audio_files') \
+                        .select('file_path, device_id, recorded_at, local_date, local_time') \
+                        .in_('file_path', chunk)
+                    audio_file_response = await asyncio.get_running_loop().run_in_executor(_io_executor, query.execute)
+                    records.update((record['file_path'], record) for record in audio_file_response.data or [])
                 except Exception as e:
-                    logger.error(f"audio_filesテーブルのクエリエラー: {file_path} - {str(e)}")
+                    logger.error("audio_filesテーブルのクエリエラー: %d件 - %s", len(chunk), e)
+
+            files_to_process = [records[file_path] for file_path in file_paths if file_path in records]
+            if len(files_to_process) < len(file_paths):
+                for file_path in file_paths:
+                    if file_path not in records:
+                        logger.warning("audio_filesテーブルにレコードが見つかりません: %s", file_path)
         
-        # 実際の音声ダウンロードと文字起こし処理
+        # Azure利用上限の判定に使う時間帯（日本時間0:00-9:00）はバッチ開始時に1回だけ判定
+        current_jst = datetime.now(timezone.utc).astimezone(JST)
+        jst_quota_window = current_jst.hour < 9
+
+        # 再処理指定時は文字起こし結果キャッシュも使わずASRを呼び直す（file_paths指定には再処理オプションがない）
+        no_cache = getattr(request, 'force_reprocess', False)
+
+        # 実際の音声ダウンロードと文字起こし処理（ASR_CONCURRENCY件まで並列実行）
+        semaphore = asyncio.Semaphore(ASR_CONCURRENCY)
+
+        async def process_with_limit(audio_file):
+            async with semaphore:
+                return await self._process_file(audio_file, jst_quota_window, no_cache=no_cache)
+
+        results = await asyncio.gather(
+            *(process_with_limit(audio_file) for audio_file in files_to_process),
+            return_exceptions=True
+        )
+
         # 処理結果を記録
         successfully_transcribed = []
         error_files = []
-        
-        for audio_file in files_to_process:
-            try:
-                file_path = audio_file['file_path']
-                recorded_at = audio_file['recorded_at']
-                device_id = audio_file['device_id']
-
-                # 一時ファイルに音声データをダウンロード
-                with tempfile.NamedTemporaryFile(suffix=".wav", delete=False) as tmp_file:
-                    tmp_file_path = tmp_file.name
-                    
-                    try:
-                        # S3からファイルをダウンロード（file_pathをそのまま使用）
-                        self.s3_client.download_file(self.s3_bucket_name, file_path, tmp_file_path)
-
-                        # ASRプロバイダーで文字起こし
-                        with open(tmp_file_path, 'rb') as audio_file_handle:
-                            transcription_result = await self.asr_provider.transcribe_audio(
-                                audio_file_handle,
-                                os.path.basename(file_path),
-                                detailed=False,
-                                high_accuracy=True  # 高精度モード使用
-                            )
-                        
-                        transcription = transcription_result["transcription"].strip()
-                        
-                        # Azure利用上限チェック（200応答だが結果が空で、発話検出フラグもない場合）
-                        is_quota_exceeded = False
-                        if not transcription and not transcription_result.get("no_speech_detected", False):
-                            # 現在時刻をチェック（UTC）
-                            import pytz
-                            from datetime import datetime as dt
-                            current_utc = dt.now(pytz.UTC)
-                            current_jst = current_utc.astimezone(pytz.timezone('Asia/Tokyo'))
-                            
-                            # 日本時間で0:00-9:00の間の場合、利用上限の可能性が高い
-                            if current_jst.hour < 9:
-                                is_quota_exceeded = True
-                                logger.warning(f"⚠️ Azure利用上限に達した可能性があります（JST: {current_jst.strftime('%H:%M')}）")
-                                logger.warning(f"   日本時間09:00以降に再実行してください")
-                        
-                        # 発話なしの判定と明確な区別
-                        final_transcription = transcription if transcription else "発話なし"
-
-                        # Get local_date and local_time from audio_files table
-                        local_date = None
-                        local_time = None
-                        try:
-                            audio_file_response = self.supabase.table('audio_files').select('local_date, local_time').eq(
-                                'device_id', device_id
-                            ).eq(
-                                'recorded_at', recorded_at
-                            ).execute()
-
-                            if audio_file_response.data and len(audio_file_response.data) > 0:
-                                local_date = audio_file_response.data[0].get('local_date')
-                                local_time = audio_file_response.data[0].get('local_time')
-                                logger.info(f"Retrieved local_date from audio_files: {local_date}")
-                                logger.info(f"Retrieved local_time from audio_files: {local_time}")
-                            else:
-                                logger.warning(f"No audio_files record found for device_id={device_id}, recorded_at={recorded_at}")
-                        except Exception as e:
-                            logger.error(f"Error fetching local_date/local_time from audio_files: {e}")
-
-                        # spot_featuresテーブルに保存（発話なしの場合は明確に「発話なし」を保存）
-                        data = {
-                            "device_id": device_id,
-                            "recorded_at": recorded_at,  # UTC timestamp
-                            "local_date": local_date,  # Local date from audio_files
-                            "local_time": local_time,  # Local time from audio_files
-                            "vibe_transcriber_result": final_transcription,  # TEXT型カラム
-                            "vibe_transcriber_status": "completed",
-                            "vibe_transcriber_processed_at": datetime.utcnow().isoformat()  # 現在のUTC時刻をISO形式で保存
-                        }
-
-                        # upsert（既存データは更新、新規データは挿入）- リトライ付き
-                        max_retries = 3
-                        retry_count = 0
-                        upsert_success = False
-
-                        while retry_count < max_retries and not upsert_success:
-                            try:
-                                if retry_count > 0:
-                                    logger.info(f"Supabase upsert retry {retry_count}/{max_retries}")
-                                    time.sleep(1 * retry_count)  # 1秒, 2秒, 3秒の遅延
-
-                                response = self.supabase.table('spot_features').upsert(data).execute()
-
-                                # レスポンスログ
-                                status_code = getattr(response, 'status_code', 'N/A')
-                                logger.info(f"Supabase upsert response: data={response.data}, count={response.count}, status_code={status_code}")
-
-                                # データが返ってこない場合のハンドリング
-                                if not response.data:
-                                    logger.warning(f"⚠️ Supabase upsert returned no data (attempt {retry_count + 1}/{max_retries})")
-                                    logger.warning(f"   - Request Payload: {data}")
-
-                                    # データが空でも、既存レコードの更新の場合は成功とみなす
-                                    # spot_featuresテーブルから既存レコードを確認
-                                    check_response = self.supabase.table('spot_features') \
-                                        .select('*') \
-                                        .eq('device_id', device_id) \
-                                        .eq('recorded_at', recorded_at) \
-                                        .execute()
-
-                                    if check_response.data:
-                                        logger.info("✅ Existing record found - treating as successful update")
-                                        upsert_success = True
-                                    else:
-                                        retry_count += 1
-                                        if retry_count >= max_retries:
-                                            raise Exception(f"Supabase upsert failed after {max_retries} attempts")
-                                else:
-                                    upsert_success = True
-
-                            except Exception as e:
-                                logger.error(f"Supabase upsert error (attempt {retry_count + 1}): {str(e)}")
-                                retry_count += 1
-                                if retry_count >= max_retries:
-                                    raise
-                        
-                        # audio_filesテーブルのtranscriptions_statusをcompletedに更新
-                        try:
-                            update_response = self.supabase.table('audio_files') \
-                                .update({'transcriptions_status': 'completed'}) \
-                                .eq('file_path', file_path) \
-                                .execute()
-                            
-                            # 更新が成功したかチェック
-                            if update_response.data:
-                                logger.info(f"✅ audio_filesテーブルのステータス更新成功: {len(update_response.data)}件更新")
-                                logger.info(f"   file_path: {file_path}")
-                            else:
-                                logger.warning(f"⚠️ audio_filesテーブルのステータス更新: 対象レコードが見つかりません")
-                                logger.warning(f"   file_path: {file_path}")
-                                
-                        except Exception as update_error:
-                            logger.error(f"❌ audio_filesテーブルのステータス更新エラー: {str(update_error)}")
-                            logger.error(f"   file_path: {file_path}")
-                        
-                        successfully_transcribed.append({
-                            'file_path': file_path
-                        })
-                        
-                        # 処理結果に応じたログ出力
-                        provider_info = f"{self.asr_provider.provider_name}/{self.asr_provider.model_name}"
-                        if transcription:
-                            logger.info(f"✅ {file_path}: 文字起こし完了・Supabase保存済み ({provider_info}) - 発話内容: {len(transcription)}文字")
-                        else:
-                            logger.info(f"✅ {file_path}: 処理完了・発話なし・Supabase保存済み ({provider_info}) - 「発話なし」として保存")
-                    
-                    finally:
-                        # 一時ファイルを削除
-                        if os.path.exists(tmp_file_path):
-                            os.unlink(tmp_file_path)
-            
-            except ClientError as e:
-                error_msg = f"{audio_file['file_path']}: S3エラー - {str(e)}"
-                logger.error(f"❌ {error_msg}")
-                error_files.append(audio_file)
-                
-                # エラー時にステータスを更新
-                try:
-                    self.supabase.table('audio_files') \
-                        .update({'transcriptions_status': 'failed'}) \
-                        .eq('file_path', audio_file['file_path']) \
-                        .execute()
-                    logger.info(f"ステータスを'failed'に更新: {audio_file['file_path']}")
-                except Exception as status_update_error:
-                    logger.error(f"ステータス更新エラー: {str(status_update_error)}")
-            
-            except Exception as e:
-                error_message = str(e)
-                logger.error(f"❌ {audio_file['file_path']}: エラー - {error_message}")
+        skipped_silent_paths = []
+        rows = []
+        failed_paths_by_status: Dict[str, List[str]] = {}
+
+        # 処理完了時刻（UTC、ISO形式）はバッチで1回だけ取得して全行に設定
+        processed_at = datetime.now(timezone.utc).isoformat()
+
+        for audio_file, result in zip(files_to_process, results):
+            if isinstance(result, BaseException):
+                logger.error("❌ %s: 予期しないエラー - %s", audio_file['file_path'], result)
+                row, failure_status = None, 'failed'
+            else:
+                row, failure_status = result
+
+            if row is not None:
+                row["vibe_transcriber_processed_at"] = processed_at
+                rows.append((audio_file['file_path'], row))
+                successfully_transcribed.append({'file_path': audio_file['file_path']})
+            elif failure_status == 'skipped_silent':
+                skipped_silent_paths.append(audio_file['file_path'])
+            else:
+                failed_paths_by_status.setdefault(failure_status, []).append(audio_file['file_path'])
                 error_files.append(audio_file)
-                
-                # エラー時にステータスを更新
-                try:
-                    # Quota exceededエラーの判定（エラーメッセージから検出）
-                    if "quota exceeded" in error_message.lower():
-                        status = 'quota_exceeded'
-                        logger.warning(f"⚠️ Azure利用上限エラーを検出しました")
-                    else:
-                        status = 'failed'
-                    
-                    self.supabase.table('audio_files') \
-                        .update({'transcriptions_status': status}) \
-                        .eq('file_path', audio_file['file_path']) \
-                        .execute()
-                    logger.info(f"ステータスを'{status}'に更新: {audio_file['file_path']}")
-                except Exception as status_update_error:
-                    logger.error(f"ステータス更新エラー: {str(status_update_error)}")
-        
+
+        # Supabaseへの保存とステータス更新をまとめて実行（ファイルごとの往復を削減）
+        loop = asyncio.get_running_loop()
+        failed_saves = await loop.run_in_executor(_io_executor, self._save_transcriptions, rows) if rows else []
+        if failed_saves:
+            # 保存に失敗した行のファイルのみ失敗扱いにする
+            failed_save_set = set(failed_saves)
+            failed_paths_by_status.setdefault('failed', []).extend(failed_saves)
+            error_files.extend(f for f in successfully_transcribed if f['file_path'] in failed_save_set)
+            successfully_transcribed = [f for f in successfully_transcribed if f['file_path'] not in failed_save_set]
+
+        # audio_filesのステータス更新の完了を待ってからレスポンスを返す
+        # （処理済みはステータスで判定してスキップするため、更新前に届いた再実行で重複処理しないようにする）
+        completed_paths = [f['file_path'] for f in successfully_transcribed]
+        status_update_failed = await loop.run_in_executor(
+            _io_executor,
+            self._update_transcription_statuses,
+            {
+                **({'completed': completed_paths} if completed_paths else {}),
+                **({'skipped_silent': skipped_silent_paths} if skipped_silent_paths else {}),
+                **failed_paths_by_status
+            }
+        )
+
         # 処理結果を返す
-        execution_time = time.time() - start_time
-        
-        # レスポンスの構築（インターフェースによって異なる）
-        if request.device_id and request.local_date:
-            # 新インターフェースのレスポンス
-            return {
-                "status": "success",
-                "summary": {
-                    "total_files": len(file_paths),
-                    "pending_processed": len(successfully_transcribed),
-                    "errors": len(error_files)
-                },
+        return self._build_response(
+            request, file_paths, successfully_transcribed, error_files,
+            time.time() - start_time, already_completed, len(skipped_silent_paths),
+            status_update_failed
+        )
+
+    def _build_response(
+        self,
+        request,
+        file_paths: List[str],
+        successfully_transcribed: List[Dict[str, Any]],
+        error_files: List[Dict[str, Any]],
+        execution_time: float,
+        already_completed: int = 0,
+        skipped_silent: int = 0,
+        status_update_failed: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """処理結果のレスポンスを構築する（新インターフェースのみデバイス・日付情報と処理済み件数を含む）"""
+        from app.models import DeviceDateRequest  # 循環インポート回避
+
+        is_device_request = isinstance(request, DeviceDateRequest)
+        processed_files = [f['file_path'] for f in successfully_transcribed]
+
+        summary = {"total_files": len(file_paths) + already_completed}
+        if is_device_request:
+            summary["already_completed"] = already_completed
+        summary["pending_processed"] = len(processed_files)
+        summary["skipped_silent"] = skipped_silent
+        summary["errors"] = len(error_files)
+
+        return {
+            "status": "success",
+            "summary": summary,
+            **({
                 "device_id": request.device_id,
                 "local_date": request.local_date,
                 "time_blocks_requested": request.time_blocks,
-                "processed_files": [f['file_path'] for f in successfully_transcribed],
-                "error_files": [f['file_path'] for f in error_files] if error_files else None,
-                "execution_time_seconds": round(execution_time, 1),
-                "message": f"{len(file_paths)}件中{len(successfully_transcribed)}件を{self.asr_provider.provider_name}で正常に処理しました",
-                "asr_provider": self.asr_provider.provider_name,
-                "asr_model": self.asr_provider.model_name
-            }
-        else:
-            # 既存インターフェースのレスポンス（後方互換性）
+            } if is_device_request else {}),
+            "processed_files": processed_files,
+            "error_files": [f['file_path'] for f in error_files] if error_files else None,
+            # ステータスを更新できなかったファイル（audio_filesは元のステータスのまま）
+            **({"status_update_failed_files": status_update_failed} if status_update_failed else {}),
+            "execution_time_seconds": round(execution_time, 1),
+            "message": f"{len(file_paths)}件中{len(processed_files)}件を{self.asr_provider.provider_name}で正常に処理しました",
+            "asr_provider": self.asr_provider.provider_name,
+            "asr_model": self.asr_provider.model_name
+        }
+
+    def _empty_response(self, request, execution_time: float, already_completed: int = 0) -> Dict[str, Any]:
+        """処理対象のファイルがない場合のレスポンス（インターフェースによって異なる）"""
+        from app.models import DeviceDateRequest  # 循環インポート回避
+
+        summary = {
+            "total_files": already_completed,
+            "already_completed": already_completed,
+            "pending_processed": 0,
+            "errors": 0
+        }
+
+        if isinstance(request, DeviceDateRequest):
             return {
                 "status": "success",
-                "summary": {
-                    "total_files": len(file_paths),
-                    "pending_processed": len(successfully_transcribed),
-                    "errors": len(error_files)
-                },
-                "processed_files": [f['file_path'] for f in successfully_transcribed],
-                "error_files": [f['file_path'] for f in error_files] if error_files else None,
+                "summary": summary,
+                "device_id": request.device_id,
+                "local_date": request.local_date,
+                "time_blocks_requested": request.time_blocks,
+                "processed_time_blocks": [],
                 "execution_time_seconds": round(execution_time, 1),
-                "message": f"{len(file_paths)}件中{len(successfully_transcribed)}件を{self.asr_provider.provider_name}で正常に処理しました",
-                "asr_provider": self.asr_provider.provider_name,
-                "asr_model": self.asr_provider.model_name
+                "message": "処理対象のファイルがありません（全て処理済みまたは該当なし）"
             }
 
+        return {
+            "status": "success",
+            "summary": summary,
+            "processed_files": [],
+            "execution_time_seconds": round(execution_time, 1),
+            "message": "処理対象のファイルがありません"
+        }
+
+    async def _transcribe_s3_object(self, file_path: str, no_cache: bool = False) -> Dict[str, Any]:
+        """
+        S3上の音声ファイルをASRプロバイダーで文字起こしする
+
+        ダウンロードした音声が無音・短すぎる場合はASRを呼ばずに skipped_silent=True の結果を返す。
+        no_cache=True（force_reprocess指定時）の場合は文字起こし結果キャッシュも無音判定も使用しない。
+        """
+        loop = asyncio.get_running_loop()
+
+        if self.asr_provider.supports_url_input:
+            # プロバイダーがS3から直接取得する（ローカルへのダウンロード・再アップロードを省略）
+            audio_url = await loop.run_in_executor(
+                _io_executor,
+                functools.partial(
+                    self.s3_client.generate_presigned_url,
+                    'get_object',
+                    Params={'Bucket': self.s3_bucket_name, 'Key': file_path},
+                    ExpiresIn=PRESIGNED_URL_EXPIRES_SECONDS
+                )
+            )
+            return await self.asr_provider.transcribe_url(
+                audio_url,
+                os.path.basename(file_path),
+                detailed=False,
+                high_accuracy=True  # 高精度モード使用
+            )
+
+        # S3の音声データをメモリ上のバッファへ直接ダウンロード（上限を超えた場合のみ一時ファイルへ退避）
+        # キャッシュ用ハッシュ計算・リトライで先頭へ戻すため、シーク可能なファイルとして保持する
+        with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, dir=get_temp_dir()) as audio_file_handle:
+            # S3からファイルをダウンロード（file_pathをそのまま使用）
+            # boto3はブロッキングのため、並行処理中の他ファイルを止めないようイベントループ外で実行
+            await loop.run_in_executor(
+                _io_executor,
+                functools.partial(
+                    self.s3_client.download_fileobj,
+                    self.s3_bucket_name,
+                    file_path,
+                    audio_file_handle,
+                    Config=self.s3_transfer_config
+                )
+            )
+            audio_file_handle.seek(0)
+
+            return await self.asr_provider.transcribe_audio_cached(
+                audio_file_handle,
+                os.path.basename(file_path),
+                detailed=False,
+                high_accuracy=True,  # 高精度モード使用
+                no_cache=no_cache,
+                skip_silent=not no_cache
+            )
+
+    async def _process_file(
+        self,
+        audio_file: Dict[str, Any],
+        jst_quota_window: bool = False,
+        no_cache: bool = False
+    ) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        1ファイル分のダウンロード・文字起こしを行う（Supabaseへの保存は呼び出し側でまとめて行う）
+
+        Args:
+            audio_file (Dict[str, Any]): 処理対象ファイルの情報
+            jst_quota_window (bool): Azure利用上限に達しやすい時間帯（日本時間0:00-9:00）の場合True
+            no_cache (bool): Trueの場合は文字起こし結果キャッシュを使用しない（force_reprocess指定時）
+
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[str]]: (spot_featuresへ保存する行, 保存しない場合のステータス)
+        """
+        try:
+            file_path = audio_file['file_path']
+
+            # ASRプロバイダーで文字起こし
+            transcription_result = await self._transcribe_s3_object(file_path, no_cache=no_cache)
+
+            # 無音判定でASRを省略した場合は簡易判定のため「発話なし」として保存せず、別のステータスで記録する
+            if transcription_result.get("skipped_silent"):
+                logger.info("🔇 %s: 無音・短すぎる音声のためASRを省略（skipped_silentとして記録）", file_path)
+                return None, 'skipped_silent'
+
+            transcription = transcription_result["transcription"].strip()
+
+            # Azure利用上限チェック（200応答だが結果が空で、発話検出フラグもない場合）
+            # 日本時間で0:00-9:00の間の場合、利用上限の可能性が高い
+            if jst_quota_window and not transcription and not transcription_result.get("no_speech_detected", False):
+                logger.warning("⚠️ %s: Azure利用上限に達した可能性があります（日本時間09:00以降に再実行してください）", file_path)
+
+            # 発話なしの判定と明確な区別
+            final_transcription = transcription if transcription else "発話なし"
+
+            # 保存する行を作成
+            row = self._build_spot_features_row(audio_file, final_transcription)
+
+            # 処理結果に応じたログ出力
+            if transcription:
+                logger.info("✅ %s: 文字起こし完了 (%s/%s) - 発話内容: %d文字", file_path,
+                            self.asr_provider.provider_name, self.asr_provider.model_name, len(transcription))
+            else:
+                logger.info("✅ %s: 処理完了・発話なし (%s/%s) - 「発話なし」として保存", file_path,
+                            self.asr_provider.provider_name, self.asr_provider.model_name)
+
+            return row, None
+        
+        except ClientError as e:
+            logger.error("❌ %s: S3エラー - %s", audio_file['file_path'], e)
+
+            # エラー時のステータス（更新は呼び出し側でまとめて行う）
+            return None, 'failed'
+        
+        except Exception as e:
+            error_message = str(e)
+            logger.error("❌ %s: エラー - %s", audio_file['file_path'], error_message)
+            
+            # Quota exceededエラーの判定（エラーメッセージから検出）
+            if "quota exceeded" in error_message.lower():
+                logger.warning("⚠️ Azure利用上限エラーを検出しました")
+                return None, 'quota_exceeded'
+
+            return None, 'failed'
+
+    def _build_spot_features_row(self, audio_file: Dict[str, Any], final_transcription: str) -> Dict[str, Any]:
+        """spot_featuresへ保存する1ファイル分の行を作成する（local_date/local_timeは取得済みのaudio_filesの値を使用）"""
+        # spot_featuresテーブルに保存（発話なしの場合は明確に「発話なし」を保存）
+        return {
+            "device_id": audio_file['device_id'],
+            "recorded_at": audio_file['recorded_at'],  # UTC timestamp
+            "local_date": audio_file.get('local_date'),  # Local date from audio_files
+            "local_time": audio_file.get('local_time'),  # Local time from audio_files
+            "vibe_transcriber_result": final_transcription,  # TEXT型カラム
+            "vibe_transcriber_status": "completed"
+            # vibe_transcriber_processed_at は保存直前に呼び出し側でまとめて設定
+        }
+
+    def _save_transcriptions(self, rows: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """
+        文字起こし結果をspot_featuresへまとめてupsertする（スレッドプール用）
+
+        Args:
+            rows (List[Tuple[str, Dict[str, Any]]]): (file_path, spot_featuresへ保存する行) のリスト
+
+        Returns:
+            List[str]: 保存に失敗したfile_pathのリスト
+        """
+        # 1回のupsertに同じ行（競合キー）が複数含まれるとPostgresがエラーにするため、競合キーで重複を除く
+        rows_by_key: Dict[Tuple[Any, Any], Dict[str, Any]] = {}
+        paths_by_key: Dict[Tuple[Any, Any], List[str]] = {}
+        for file_path, row in rows:
+            key = (row['device_id'], row['recorded_at'])
+            rows_by_key[key] = row
+            paths_by_key.setdefault(key, []).append(file_path)
+
+        keys = list(rows_by_key)
+        failed_paths: List[str] = []
+
+        for offset in range(0, len(keys), SUPABASE_BATCH_SIZE):
+            chunk_keys = keys[offset:offset + SUPABASE_BATCH_SIZE]
+            if self._upsert_spot_features([rows_by_key[key] for key in chunk_keys]):
+                continue
+
+            # まとめての保存に失敗した場合は1行ずつ保存し、失敗した行のファイルのみ失敗扱いにする
+            logger.warning("⚠️ Supabase一括upsertに失敗したため1件ずつ保存します（%d件）", len(chunk_keys))
+            for key in chunk_keys:
+                if not self._upsert_spot_features([rows_by_key[key]], max_retries=1):
+                    failed_paths.extend(paths_by_key[key])
+
+        return failed_paths
+
+    def _upsert_spot_features(self, chunk: List[Dict[str, Any]], max_retries: int = 3) -> bool:
+        """spot_featuresへ1回分の行をupsertする（リトライ付き、全件成功した場合True）"""
+        retry_count = 0
+
+        while retry_count < max_retries:
+            try:
+                if retry_count > 0:
+                    logger.info("Supabase upsert retry %d/%d", retry_count, max_retries)
+                    # 指数バックオフ＋ジッター（同時にリトライするリクエストのタイミングを分散）
+                    # スレッドプール上で実行されるため、time.sleepでもイベントループは止まらない
+                    time.sleep(min(2 ** retry_count, 8) + random.random() * 0.5)
+
+                # 書き込んだ行のエコーバックは不要なため、returning=minimalで応答ボディを省略
+                # （失敗時はexecute()がAPIErrorを送出する）
+                self.supabase.table('spot_features').upsert(chunk, returning='minimal').execute()
+                logger.info("Supabase upsert成功: %d件", len(chunk))
+                return True
+
+            except Exception as e:
+                logger.error("Supabase upsert error (attempt %d): %s", retry_count + 1, e)
+                retry_count += 1
+
+        logger.error("❌ Supabase upsert failed after %d attempts (%d件)", max_retries, len(chunk))
+        return False
+
+    def _update_transcription_statuses(self, file_paths_by_status: Dict[str, List[str]]) -> List[str]:
+        """
+        audio_filesのtranscriptions_statusをステータスごとにまとめて更新する（スレッドプール用）
+
+        Returns:
+            List[str]: 更新リクエストが失敗したfile_pathのリスト
+        """
+        failed_paths = []
+        for status, file_paths in file_paths_by_status.items():
+            batch_size = len(file_paths) if SUPABASE_STATUS_RPC else SUPABASE_IN_FILTER_SIZE
+            for offset in range(0, len(file_paths), batch_size):
+                chunk = file_paths[offset:offset + batch_size]
+                try:
+                    if SUPABASE_STATUS_RPC:
+                        rpc_response = self.supabase.rpc(
+                            'update_transcriptions_status',
+                            {'paths': chunk, 'new_status': status}
+                        ).execute()
+                        updated = rpc_response.data or 0
+                    else:
+                        # returning=minimalでは応答ボディが空になり件数を取得できないため、既定のreturnで件数を確認
+                        update_response = self.supabase.table('audio_files') \
+                            .update({'transcriptions_status': status}, count='exact') \
+                            .in_('file_path', chunk) \
+                            .execute()
+                        updated = update_response.count if update_response.count is not None else len(update_response.data or [])
+
+                    # 更新が成功したかチェック
+                    if updated:
+                        logger.info("✅ audio_filesテーブルのステータス更新成功: '%s' %d/%d件", status, updated, len(chunk))
+                    if updated < len(chunk):
+                        logger.warning("⚠️ audio_filesテーブルのステータス更新: 対象レコードが見つからないファイルがあります（'%s' %d件）", status, len(chunk) - updated)
+
+                except Exception as update_error:
+                    logger.error("❌ audio_filesテーブルのステータス更新エラー（'%s' %d件）: %s", status, len(chunk), update_error)
+                    failed_paths.extend(chunk)
+
+        return failed_paths
+
 # サービスインスタンス
 transcriber_service = TranscriberService() 
\ No newline at end of file
@@ -1,27 +1,45 @@
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Request
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 from dotenv import load_dotenv
 from app.routes import router
-from app.asr_providers import CURRENT_PROVIDER, CURRENT_MODEL
+from app.services import transcriber_service
+from app.asr_providers import CURRENT_PROVIDER, CURRENT_MODEL, close_http_client, close_redis_client
 
 
 # 環境変数読み込み
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """起動時にASRプロバイダーを事前準備し、終了時に接続をクローズ"""
+    # ASRプロバイダーの事前準備（Azureは認識器、Groq/DeepgramはHTTPSの事前接続）
+    transcriber_service.asr_provider.warm_up()
+    yield
+    # ASRプロバイダー共通のHTTPクライアント・共有キャッシュ接続をクローズ
+    await close_http_client()
+    await close_redis_client()
+
 # FastAPIアプリケーション作成
 app = FastAPI(
     title="WatchMe Transcriber API",
     description="マルチプロバイダー対応の音声文字起こしAPI (Azure, Groq)",
-    version="2.0.0"
+    version="2.0.0",
+    default_response_class=ORJSONResponse,  # レスポンスはorjsonでシリアライズ
+    lifespan=lifespan
 )
 
-# CORS設定
+# レスポンス圧縮（文字起こし結果のJSONは圧縮効果が大きい）
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+# CORS設定（CORS_ALLOW_ORIGINSにカンマ区切りで指定、未設定の場合は全オリジンを許可）
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[origin.strip() for origin in os.getenv("CORS_ALLOW_ORIGINS", "*").split(",") if origin.strip()],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
@@ -53,4 +71,7 @@ if __name__ == "__main__":
     import uvicorn
     # ローカル・本番環境ともにポート8013で統一
     port = 8013
-    uvicorn.run(app, host="0.0.0.0", port=port) 
\ No newline at end of file
+    # ワーカー数（既定は1、WEB_CONCURRENCYで指定）。キャッシュ・認識器プールはワーカープロセスごとに保持される
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    # イベントループにuvloop、HTTPパーサーにhttptoolsを使用（多数の並行I/Oのスループット向上）
+    uvicorn.run("main:app", host="0.0.0.0", port=port, loop="uvloop", http="httptools", workers=workers) 
\ No newline at end of file
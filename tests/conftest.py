@@ -0,0 +1,12 @@
+import os
+import sys
+
+# アプリのインポート時に外部サービスの設定が必須のため、テスト用のダミー値を設定
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "test.supabase.key")
+os.environ.setdefault("AWS_ACCESS_KEY_ID", "test-access-key")
+os.environ.setdefault("AWS_SECRET_ACCESS_KEY", "test-secret-key")
+os.environ.setdefault("DEEPGRAM_API_KEY", "test-deepgram-key")
+os.environ.pop("REDIS_URL", None)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,249 @@
+import asyncio
+import io
+import wave
+from collections import OrderedDict
+
+import httpx
+import pytest
+from fastapi import HTTPException
+
+from app import audio_utils
+from app.asr_providers import (
+    ASRFactory,
+    ASRProvider,
+    AzureProvider,
+    AzureRecognitionCanceledError,
+    TransientAzureError,
+    _is_transient_error,
+)
+
+
+class StubProvider(ASRProvider):
+    """transcribe_audioの呼び出しを記録するだけのプロバイダー"""
+
+    def __init__(self, reusable=True):
+        self.calls = 0
+        self._reusable = reusable
+
+    async def transcribe_audio(self, audio_file, filename, detailed=False, high_accuracy=False):
+        self.calls += 1
+        return {"transcription": f"結果{self.calls}", "processing_time": 1.0}
+
+    @property
+    def provider_name(self):
+        return "stub"
+
+    @property
+    def model_name(self):
+        return "stub-model"
+
+    @property
+    def reusable(self):
+        return self._reusable
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(ASRProvider, "_cache", OrderedDict())
+
+
+def _wav(frames: bytes) -> io.BytesIO:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_writer:
+        wav_writer.setnchannels(1)
+        wav_writer.setsampwidth(2)
+        wav_writer.setframerate(16000)
+        wav_writer.writeframes(frames)
+    buffer.seek(0)
+    return buffer
+
+
+def _transcribe(provider, audio_file, **kwargs):
+    return asyncio.run(provider.transcribe_audio_cached(audio_file, "audio.wav", **kwargs))
+
+
+def test_same_audio_is_served_from_cache():
+    provider = StubProvider()
+
+    first = _transcribe(provider, io.BytesIO(b"audio-a"))
+    second = _transcribe(provider, io.BytesIO(b"audio-a"))
+    other = _transcribe(provider, io.BytesIO(b"audio-b"))
+
+    assert provider.calls == 2
+    assert first == {"transcription": "結果1", "processing_time": 1.0}
+    assert second == {"transcription": "結果1", "processing_time": 0.0, "cached": True}
+    assert other["transcription"] == "結果2"
+
+
+def test_cache_key_includes_mode():
+    provider = StubProvider()
+
+    _transcribe(provider, io.BytesIO(b"audio-a"))
+    result = _transcribe(provider, io.BytesIO(b"audio-a"), high_accuracy=True)
+
+    assert provider.calls == 2
+    assert "cached" not in result
+
+
+def test_no_cache_always_calls_asr():
+    provider = StubProvider()
+
+    _transcribe(provider, io.BytesIO(b"audio-a"))
+    result = _transcribe(provider, io.BytesIO(b"audio-a"), no_cache=True)
+
+    assert provider.calls == 2
+    assert result["transcription"] == "結果2"
+
+
+def test_silent_audio_skips_asr_without_caching(monkeypatch):
+    monkeypatch.setattr(audio_utils, "SILENCE_PEAK_THRESHOLD", 500)
+    provider = StubProvider()
+
+    result = _transcribe(provider, _wav(b"\x00\x00" * 16000))
+
+    assert provider.calls == 0
+    assert result["transcription"] == ""
+    assert result["no_speech_detected"] is True
+    assert len(ASRProvider._cache) == 0
+
+
+def test_skip_silent_false_calls_asr_and_still_caches(monkeypatch):
+    monkeypatch.setattr(audio_utils, "SILENCE_PEAK_THRESHOLD", 500)
+    provider = StubProvider()
+
+    first = _transcribe(provider, _wav(b"\x00\x00" * 16000), skip_silent=False)
+    second = _transcribe(provider, _wav(b"\x00\x00" * 16000), skip_silent=False)
+
+    assert provider.calls == 1
+    assert first["transcription"] == "結果1"
+    assert second["cached"] is True
+
+
+@pytest.fixture
+def created(monkeypatch):
+    """ASRFactory.createに渡された引数を記録し、スタブを返す"""
+    calls = []
+
+    def fake_create(provider, model=None):
+        calls.append((provider, model))
+        return StubProvider(reusable=provider != "aiola")
+
+    monkeypatch.setattr(ASRFactory, "_instances", {})
+    monkeypatch.setattr(ASRFactory, "create", staticmethod(fake_create))
+    return calls
+
+
+def test_factory_reuses_default_models(created):
+    first = ASRFactory.get("Deepgram")
+    second = ASRFactory.get("deepgram", "nova-3")
+
+    assert first is second
+    assert created == [("deepgram", None)]
+
+
+def test_factory_does_not_keep_arbitrary_models(created):
+    first = ASRFactory.get("deepgram", "user-supplied-model")
+    second = ASRFactory.get("deepgram", "user-supplied-model")
+
+    assert first is not second
+    assert len(created) == 2
+    assert ASRFactory._instances == {}
+
+
+def test_factory_does_not_keep_token_based_providers(created):
+    first = ASRFactory.get("aiola")
+    second = ASRFactory.get("aiola")
+
+    assert first is not second
+    assert ASRFactory._instances == {}
+
+
+def test_transcribe_url_is_rejected_without_url_support():
+    provider = StubProvider()
+    assert not provider.supports_url_input
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(provider.transcribe_url("https://example.com/audio.wav", "audio.wav"))
+
+    assert exc_info.value.status_code == 501
+
+
+def _http_status_error(status_code):
+    request = httpx.Request("POST", "https://asr.test")
+    return httpx.HTTPStatusError("error", request=request, response=httpx.Response(status_code, request=request))
+
+
+def _wrapped(cause):
+    """プロバイダーと同様にHTTPExceptionへ包んだ例外を作る"""
+    try:
+        raise HTTPException(status_code=500, detail=str(cause)) from cause
+    except HTTPException as e:
+        return e
+
+
+@pytest.mark.parametrize("cause, expected", [
+    (_http_status_error(500), True),
+    (_http_status_error(503), True),
+    (_http_status_error(408), True),
+    (_http_status_error(429), True),
+    (_http_status_error(400), False),
+    (_http_status_error(401), False),
+    (httpx.ConnectError("connection refused"), True),
+    (httpx.ReadTimeout("timeout"), True),
+    (ConnectionResetError(), True),
+    (TimeoutError(), True),
+    (TransientAzureError("Too many requests"), True),
+    (AzureRecognitionCanceledError("AuthenticationFailure"), False),
+    (wave.Error("file does not start with RIFF id"), False),
+    (KeyError("text"), False),
+    (ValueError("invalid"), False),
+    (HTTPException(status_code=400, detail="NoMatch"), False),
+    (HTTPException(status_code=500, detail="バッチ文字起こし失敗"), False),
+])
+def test_is_transient_error(cause, expected):
+    assert _is_transient_error(cause) is expected
+    assert _is_transient_error(_wrapped(cause)) is expected
+
+
+@pytest.mark.parametrize("error_details, exception_type", [
+    ("Too many requests. Please retry later.", TransientAzureError),
+    ("Audio buffer exceeded the limit", TransientAzureError),
+    ("WebSocket upgrade failed: Authentication error (401)", AzureRecognitionCanceledError),
+    ("Invalid subscription key or wrong API endpoint", AzureRecognitionCanceledError),
+])
+def test_azure_cancellations_are_classified_by_error_details(error_details, exception_type):
+    provider = AzureProvider.__new__(AzureProvider)
+    errors = [{"type": "Canceled", "reason": "CancellationReason.Error", "error_details": error_details}]
+
+    with pytest.raises(AzureRecognitionCanceledError) as exc_info:
+        provider._handle_recognition_errors(errors)
+
+    assert type(exc_info.value) is exception_type
+    assert error_details in str(exc_info.value)
+
+
+def test_azure_rejects_non_pcm_audio_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_utils.shutil, "which", lambda name: None)
+    provider = AzureProvider.__new__(AzureProvider)
+
+    async def fail_if_called(*args, **kwargs):
+        raise AssertionError("変換できない音声で認識を開始した")
+
+    monkeypatch.setattr(provider, "_transcribe_normalized", fail_if_called)
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(provider.transcribe_audio(io.BytesIO(b"ID3\x03\x00" + b"\x00" * 100), "audio.mp3"))
+
+    assert exc_info.value.status_code == 415
+
+
+def test_azure_accepts_pcm_wav_without_ffmpeg(monkeypatch):
+    monkeypatch.setattr(audio_utils.shutil, "which", lambda name: None)
+    provider = AzureProvider.__new__(AzureProvider)
+
+    async def fake_transcribe(audio_file, filename, detailed, high_accuracy):
+        return {"transcription": "こんにちは"}
+
+    monkeypatch.setattr(provider, "_transcribe_normalized", fake_transcribe)
+
+    assert asyncio.run(provider.transcribe_audio(_wav(b"\x00\x00" * 16000), "audio.wav")) == {"transcription": "こんにちは"}
@@ -0,0 +1,113 @@
+import hashlib
+import io
+import math
+import tempfile
+import wave
+
+import httpx
+import pytest
+
+from app import audio_utils
+from app.audio_utils import UploadReader, is_silent, update_digest
+
+
+def _wav(samples):
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav_writer:
+        wav_writer.setnchannels(1)
+        wav_writer.setsampwidth(2)
+        wav_writer.setframerate(16000)
+        wav_writer.writeframes(b"".join(int(s).to_bytes(2, "little", signed=True) for s in samples))
+    buffer.seek(0)
+    return buffer
+
+
+def _sine(peak, seconds=1.0, freq=440):
+    return [peak * math.sin(2 * math.pi * freq * i / 16000) for i in range(int(16000 * seconds))]
+
+
+def test_silence_check_is_disabled_by_default():
+    assert audio_utils.SILENCE_PEAK_THRESHOLD == 0
+    assert not is_silent(_wav([0] * 16000))
+
+
+def test_too_short_audio_is_silent_without_peak_threshold():
+    # 長さの判定は振幅のしきい値が無効でも行う
+    assert audio_utils.MIN_AUDIO_DURATION_MS == 300
+    assert is_silent(_wav(_sine(3000, seconds=0.1)))
+
+
+def test_quiet_speech_is_not_silent_by_default():
+    # 振幅400程度の小さな声は、既定設定では無音とみなさない
+    assert not is_silent(_wav(_sine(400)))
+
+
+@pytest.mark.parametrize("samples, expected", [
+    ([0] * 16000, True),
+    (_sine(3000), False),
+    ([0] * 1600, True),  # MIN_AUDIO_DURATION_MS未満
+])
+def test_silence_check_when_enabled(monkeypatch, samples, expected):
+    monkeypatch.setattr(audio_utils, "SILENCE_PEAK_THRESHOLD", 500)
+    audio_file = _wav(samples)
+
+    assert is_silent(audio_file) is expected
+    assert audio_file.tell() == 0
+
+
+def test_is_silent_and_update_digest_hash_the_whole_file(monkeypatch):
+    monkeypatch.setattr(audio_utils, "SILENCE_PEAK_THRESHOLD", 500)
+    audio_file = _wav(_sine(3000))
+    expected = hashlib.blake2b(audio_file.getvalue(), digest_size=16).hexdigest()
+
+    # 発話を検出して途中で判定を打ち切っても、残りを読み切ってハッシュを計算する
+    digest = hashlib.blake2b(digest_size=16)
+    assert not is_silent(audio_file, digest)
+    assert digest.hexdigest() == expected
+
+    digest = hashlib.blake2b(digest_size=16)
+    update_digest(audio_file, digest)
+    assert digest.hexdigest() == expected
+    assert audio_file.tell() == 0
+
+
+def test_upload_reader_keeps_spooled_file_in_memory():
+    received = []
+
+    def handler(request):
+        received.append(request.read())
+        return httpx.Response(200)
+
+    with tempfile.SpooledTemporaryFile(max_size=1024 * 1024) as audio_file:
+        audio_file.write(b"RIFF" + b"\x00" * 1000)
+        audio_file.seek(0)
+
+        with httpx.Client(transport=httpx.MockTransport(handler)) as client:
+            request = client.build_request("POST", "http://asr.test", files={"file": ("audio.wav", UploadReader(audio_file))})
+            assert int(request.headers["content-length"]) > 1004
+            client.send(request)
+
+        assert not audio_file._rolled
+
+    assert b"RIFF" + b"\x00" * 1000 in received[0]
+
+
+def test_rms_check_is_opt_in(monkeypatch):
+    assert audio_utils.SILENCE_RMS_THRESHOLD == 0
+    assert not is_silent(_wav(_sine(40)))
+
+    monkeypatch.setattr(audio_utils, "SILENCE_RMS_THRESHOLD", 50)
+    audio_file = _wav(_sine(40))  # RMS約28
+    assert is_silent(audio_file)
+    assert audio_file.tell() == 0
+    assert not is_silent(_wav(_sine(100)))  # RMS約71
+
+
+def test_rms_check_flags_rare_peaks_in_silence(monkeypatch):
+    # 振幅判定では発話フレームが多すぎても、全体のRMSが低ければ無音とみなす
+    monkeypatch.setattr(audio_utils, "SILENCE_PEAK_THRESHOLD", 500)
+    samples = [600 if i % 480 == 0 else 0 for i in range(16000)]
+    assert not is_silent(_wav(samples))
+
+    monkeypatch.setattr(audio_utils, "SILENCE_RMS_THRESHOLD", 50)
+    assert is_silent(_wav(samples))
@@ -0,0 +1,43 @@
+import pytest
+from pydantic import TypeAdapter, ValidationError
+
+from app.models import DeviceDateRequest, FetchAndTranscribeRequest, FilePathsRequest
+
+request_adapter = TypeAdapter(FetchAndTranscribeRequest)
+
+
+def test_device_date_takes_priority_over_file_paths():
+    request = request_adapter.validate_python({
+        "device_id": "device-1",
+        "local_date": "2025-08-26",
+        "file_paths": ["a.wav"],
+    })
+
+    assert isinstance(request, DeviceDateRequest)
+
+
+def test_file_paths_request():
+    request = request_adapter.validate_python({"file_paths": ["a.wav"], "model": "groq"})
+
+    assert isinstance(request, FilePathsRequest)
+    assert request.file_paths == ["a.wav"]
+    assert request.model == "groq"
+
+
+@pytest.mark.parametrize("payload", [
+    {},
+    {"file_paths": []},
+    {"device_id": "device-1"},
+    {"local_date": "2025-08-26"},
+])
+def test_incomplete_requests_are_rejected(payload):
+    with pytest.raises(ValidationError) as exc_info:
+        request_adapter.validate_python(payload)
+
+    assert exc_info.value.errors()[0]["type"] == "invalid_request"
+
+
+def test_already_validated_requests_are_accepted():
+    request = DeviceDateRequest(device_id="device-1", local_date="2025-08-26")
+
+    assert request_adapter.validate_python(request) is request
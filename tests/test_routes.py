@@ -0,0 +1,157 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from app.models import DeviceDateRequest, FilePathsRequest
+from app.services import transcriber_service
+
+
+@pytest.fixture
+def client():
+    return TestClient(main.app)
+
+
+@pytest.fixture
+def received(monkeypatch):
+    """fetch_and_transcribe_filesに渡されたリクエストを記録する"""
+    requests = []
+
+    async def fake_fetch_and_transcribe_files(request):
+        requests.append(request)
+        return {"status": "success"}
+
+    monkeypatch.setattr(transcriber_service, "fetch_and_transcribe_files", fake_fetch_and_transcribe_files)
+    return requests
+
+
+def test_fetch_and_transcribe_accepts_device_date_body(client, received):
+    response = client.post("/fetch-and-transcribe", json={
+        "device_id": "device-1",
+        "local_date": "2025-08-26",
+        "time_blocks": ["09-00"],
+    })
+
+    assert response.status_code == 200
+    assert isinstance(received[0], DeviceDateRequest)
+    assert received[0].time_blocks == ["09-00"]
+    assert received[0].force_reprocess is False
+
+
+def test_fetch_and_transcribe_accepts_file_paths_body(client, received):
+    response = client.post("/fetch-and-transcribe", json={
+        "file_paths": ["files/device-1/2025-08-26/09-00/audio.wav"],
+    })
+
+    assert response.status_code == 200
+    assert isinstance(received[0], FilePathsRequest)
+
+
+def test_fetch_and_transcribe_rejects_unknown_body(client, received):
+    response = client.post("/fetch-and-transcribe", json={"device_id": "device-1"})
+
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["type"] == "invalid_request"
+    assert received == []
+
+
+def test_fetch_and_transcribe_rejects_unsupported_model(client, received):
+    response = client.post("/fetch-and-transcribe", json={"file_paths": ["a.wav"], "model": "whisper"})
+
+    assert response.status_code == 400
+    assert received == []
+
+
+class StubProvider:
+    """固定の文字起こし結果を返すプロバイダー"""
+
+    provider_name = "stub"
+    model_name = "stub-model"
+
+    def __init__(self, result):
+        self.result = result
+
+    async def transcribe_audio_cached(self, audio_file, filename, detailed=False, high_accuracy=False, no_cache=False):
+        return dict(self.result)
+
+
+@pytest.fixture
+def use_provider(monkeypatch):
+    def use(result):
+        monkeypatch.setattr(transcriber_service, "asr_provider", StubProvider(result))
+    return use
+
+
+def _analyze(client, detailed=False, headers=None):
+    return client.post(
+        "/analyze/azure",
+        params={"detailed": detailed},
+        files={"file": ("audio.wav", b"RIFF", "audio/wav")},
+        headers=headers,
+    )
+
+
+def test_analyze_drops_internal_keys(client, use_provider):
+    use_provider({"transcription": "こんにちは", "confidence": 0.9, "cached": True, "no_speech_detected": False})
+
+    response = _analyze(client)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["transcription"] == "こんにちは"
+    assert body["asr_provider"] == "stub"
+    assert "cached" not in body
+    assert "no_speech_detected" not in body
+
+
+def test_analyze_detailed_validates_through_response_model(client, use_provider):
+    use_provider({
+        "transcription": "こんにちは",
+        "detailed_mode": True,
+        "speakers": {0: {"words": ["こんにちは"], "start": [0.0], "end": [0.5], "confidence": [0.9]}},
+        "speaker_count": 1,
+        "warnings": ["内部用のエラー詳細"],
+        "cached": True,
+        "raw_response": object(),  # JSONへシリアライズできない値も500にならない
+    })
+
+    response = _analyze(client, detailed=True)
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["detailed_mode"] is True
+    assert body["speakers"] == {"0": {"words": ["こんにちは"], "start": [0.0], "end": [0.5], "confidence": [0.9]}}
+    assert body["speaker_count"] == 1
+    for key in ("warnings", "cached", "raw_response"):
+        assert key not in body
+
+
+def test_large_responses_are_gzipped(client, use_provider):
+    use_provider({"transcription": "あ" * 2000})
+
+    response = _analyze(client, headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"] == "application/json"
+    assert response.json()["transcription"] == "あ" * 2000
+
+
+def test_lifespan_warms_up_and_cleans_up(monkeypatch):
+    events = []
+
+    class WarmUpProvider:
+        def warm_up(self):
+            events.append("warm_up")
+
+    async def record(name):
+        events.append(name)
+
+    monkeypatch.setattr(transcriber_service, "asr_provider", WarmUpProvider())
+    monkeypatch.setattr(main, "close_http_client", lambda: record("close_http_client"))
+    monkeypatch.setattr(main, "close_redis_client", lambda: record("close_redis_client"))
+
+    with TestClient(main.app) as client:
+        assert client.get("/health").status_code == 200
+        assert events == ["warm_up"]
+
+    assert events == ["warm_up", "close_http_client", "close_redis_client"]
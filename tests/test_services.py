@@ -0,0 +1,240 @@
+import asyncio
+import json
+import logging
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from postgrest import SyncPostgrestClient
+
+from app import services
+from app.models import DeviceDateRequest
+from app.services import TranscriberService
+
+
+class FakePostgrest:
+    """PostgRESTへのリクエストを記録し、テーブルごとの応答を返すモック"""
+
+    def __init__(self, handler):
+        self.requests = []
+
+        def transport_handler(request: httpx.Request) -> httpx.Response:
+            self.requests.append(request)
+            response = handler(request)
+            # PostgRESTと同様に、return=minimal指定時はボディを返さない（Content-Rangeのみ）
+            if response.is_success and "return=minimal" in request.headers.get("prefer", ""):
+                return httpx.Response(204 if request.method == "PATCH" else 201, headers=response.headers)
+            return response
+
+        self.client = SyncPostgrestClient("http://postgrest.test")
+        self.client.session = httpx.Client(
+            base_url="http://postgrest.test",
+            headers=self.client.session.headers,
+            transport=httpx.MockTransport(transport_handler),
+        )
+        # 外部サービスに接続する__init__は通さず、Supabaseクライアントのみ差し替えたサービスを作成
+        self.service = TranscriberService.__new__(TranscriberService)
+        self.service.supabase = SimpleNamespace(table=self.client.from_, rpc=self.client.rpc)
+
+
+def test_update_statuses_reports_updated_count(caplog):
+    def handler(request):
+        paths = request.url.params["file_path"].removeprefix("in.(").removesuffix(")").split(",")
+        rows = [{"file_path": path.strip('"')} for path in paths]
+        return httpx.Response(200, json=rows, headers={"content-range": f"0-{len(rows) - 1}/{len(rows)}"})
+
+    fake = FakePostgrest(handler)
+    with caplog.at_level(logging.INFO, logger="app.services"):
+        fake.service._update_transcription_statuses({"completed": ["a.wav", "b.wav"]})
+
+    assert len(fake.requests) == 1
+    assert fake.requests[0].method == "PATCH"
+    assert json.loads(fake.requests[0].content) == {"transcriptions_status": "completed"}
+    assert "ステータス更新成功: 'completed' 2/2件" in caplog.text
+    assert "対象レコードが見つからない" not in caplog.text
+
+
+def test_update_statuses_warns_on_missing_records(caplog):
+    def handler(request):
+        return httpx.Response(200, json=[{"file_path": "a.wav"}], headers={"content-range": "0-0/1"})
+
+    fake = FakePostgrest(handler)
+    with caplog.at_level(logging.INFO, logger="app.services"):
+        fake.service._update_transcription_statuses({"failed": ["a.wav", "b.wav"]})
+
+    assert "'failed' 1件" in caplog.text
+
+
+def test_update_statuses_keeps_in_filter_urls_short():
+    def handler(request):
+        return httpx.Response(200, json=[], headers={"content-range": "*/0"})
+
+    fake = FakePostgrest(handler)
+    paths = [f"files/d067d407-cf73-4174-a9c1-d91fb60d64d0/2025-08-26/{i:05d}/audio.wav" for i in range(250)]
+    fake.service._update_transcription_statuses({"completed": paths})
+
+    assert len(fake.requests) == 3
+    assert all(len(str(request.url)) < 8 * 1024 for request in fake.requests)
+
+
+def _row(device_id, recorded_at, text="こんにちは"):
+    return {"device_id": device_id, "recorded_at": recorded_at, "vibe_transcriber_result": text}
+
+
+def test_save_transcriptions_dedupes_conflict_keys_in_one_upsert():
+    fake = FakePostgrest(lambda request: httpx.Response(201, json=[]))
+    rows = [
+        ("a.wav", _row("device-1", "2025-08-26T00:00:00Z", "1回目")),
+        ("a.wav", _row("device-1", "2025-08-26T00:00:00Z", "2回目")),
+        ("b.wav", _row("device-1", "2025-08-26T00:30:00Z")),
+    ]
+
+    assert fake.service._save_transcriptions(rows) == []
+
+    assert len(fake.requests) == 1
+    assert fake.requests[0].method == "POST"
+    assert "resolution=merge-duplicates" in fake.requests[0].headers["prefer"]
+    body = json.loads(fake.requests[0].content)
+    assert [row["recorded_at"] for row in body] == ["2025-08-26T00:00:00Z", "2025-08-26T00:30:00Z"]
+    assert body[0]["vibe_transcriber_result"] == "2回目"
+
+
+def test_save_transcriptions_falls_back_to_single_rows(monkeypatch):
+    monkeypatch.setattr(services.time, "sleep", lambda seconds: None)
+
+    def handler(request):
+        body = json.loads(request.content)
+        if any(row["device_id"] == "bad-device" for row in body):
+            return httpx.Response(400, json={"message": "invalid input", "code": "22P02", "details": None, "hint": None})
+        return httpx.Response(201, json=[])
+
+    fake = FakePostgrest(handler)
+    rows = [
+        ("a.wav", _row("device-1", "2025-08-26T00:00:00Z")),
+        ("bad.wav", _row("bad-device", "2025-08-26T00:00:00Z")),
+        ("c.wav", _row("device-1", "2025-08-26T01:00:00Z")),
+    ]
+
+    assert fake.service._save_transcriptions(rows) == ["bad.wav"]
+    # 一括（3回リトライ）の後、1件ずつ保存
+    assert len(fake.requests) == 3 + 3
+
+
+def test_save_transcriptions_retries_transient_errors(monkeypatch):
+    monkeypatch.setattr(services.time, "sleep", lambda seconds: None)
+    statuses = iter([503, 201])
+
+    fake = FakePostgrest(lambda request: httpx.Response(next(statuses), json=[]))
+
+    assert fake.service._save_transcriptions([("a.wav", _row("device-1", "2025-08-26T00:00:00Z"))]) == []
+    assert len(fake.requests) == 2
+
+
+@pytest.mark.parametrize("no_cache", [False, True])
+def test_transcribe_s3_object_passes_no_cache(no_cache):
+    calls = []
+
+    class FakeProvider:
+        supports_url_input = False
+
+        async def transcribe_audio_cached(self, audio_file, filename, detailed=False, high_accuracy=False, no_cache=False, skip_silent=True):
+            calls.append({"filename": filename, "body": audio_file.read(), "no_cache": no_cache, "skip_silent": skip_silent})
+            return {"transcription": "こんにちは"}
+
+    class FakeS3:
+        def download_fileobj(self, bucket, key, fileobj, Config=None):
+            fileobj.write(b"RIFF")
+
+    service = TranscriberService.__new__(TranscriberService)
+    service.asr_provider = FakeProvider()
+    service.s3_client = FakeS3()
+    service.s3_bucket_name = "bucket"
+    service.s3_transfer_config = None
+
+    result = asyncio.run(service._transcribe_s3_object("dev/2025-01-01/00-00/audio.wav", no_cache=no_cache))
+
+    assert result == {"transcription": "こんにちは"}
+    # 再処理指定時はキャッシュも無音判定も使わずASRで確認する
+    assert calls == [{"filename": "audio.wav", "body": b"RIFF", "no_cache": no_cache, "skip_silent": not no_cache}]
+
+
+def _audio_file(file_path, recorded_at, status="pending"):
+    return {
+        "file_path": file_path,
+        "device_id": "device-1",
+        "recorded_at": recorded_at,
+        "local_date": "2025-08-26",
+        "local_time": recorded_at[11:19],
+        "transcriptions_status": status,
+    }
+
+
+def test_fetch_records_silent_files_separately(monkeypatch):
+    audio_files = [
+        _audio_file("speech.wav", "2025-08-26T00:00:00Z"),
+        _audio_file("silent.wav", "2025-08-26T00:30:00Z"),
+        _audio_file("done.wav", "2025-08-26T01:00:00Z", status="completed"),
+        _audio_file("done-silent.wav", "2025-08-26T01:30:00Z", status="skipped_silent"),
+    ]
+
+    def handler(request):
+        if request.method == "GET":
+            return httpx.Response(200, json=audio_files)
+        if request.method == "POST":
+            return httpx.Response(201, json=[])
+        return httpx.Response(200, json=[{}], headers={"content-range": "0-0/1"})
+
+    results = {
+        "speech.wav": {"transcription": "こんにちは"},
+        "silent.wav": {"transcription": "", "no_speech_detected": True, "skipped_silent": True},
+    }
+
+    async def fake_transcribe(file_path, no_cache=False):
+        return results[file_path]
+
+    fake = FakePostgrest(handler)
+    fake.service.asr_provider = SimpleNamespace(provider_name="stub", model_name="stub-model")
+    monkeypatch.setattr(fake.service, "_transcribe_s3_object", fake_transcribe)
+
+    response = asyncio.run(fake.service.fetch_and_transcribe_files(
+        DeviceDateRequest(device_id="device-1", local_date="2025-08-26")
+    ))
+
+    # 処理済み（completed・skipped_silent）は再処理せず、無音ファイルは保存せずに別ステータスで記録する
+    assert response["summary"] == {
+        "total_files": 4, "already_completed": 2, "pending_processed": 1, "skipped_silent": 1, "errors": 0
+    }
+    assert response["processed_files"] == ["speech.wav"]
+
+    upserts = [json.loads(r.content) for r in fake.requests if r.method == "POST"]
+    assert [[row["vibe_transcriber_result"] for row in body] for body in upserts] == [["こんにちは"]]
+    updates = {
+        json.loads(r.content)["transcriptions_status"]: r.url.params["file_path"]
+        for r in fake.requests if r.method == "PATCH"
+    }
+    assert updates == {"completed": "in.(speech.wav)", "skipped_silent": "in.(silent.wav)"}
+
+
+def test_fetch_reports_failed_status_updates(monkeypatch):
+    def handler(request):
+        if request.method == "GET":
+            return httpx.Response(200, json=[_audio_file("speech.wav", "2025-08-26T00:00:00Z")])
+        if request.method == "POST":
+            return httpx.Response(201, json=[])
+        return httpx.Response(503, json={"message": "unavailable", "code": "503", "details": None, "hint": None})
+
+    async def fake_transcribe(file_path, no_cache=False):
+        return {"transcription": "こんにちは"}
+
+    fake = FakePostgrest(handler)
+    fake.service.asr_provider = SimpleNamespace(provider_name="stub", model_name="stub-model")
+    monkeypatch.setattr(fake.service, "_transcribe_s3_object", fake_transcribe)
+
+    response = asyncio.run(fake.service.fetch_and_transcribe_files(
+        DeviceDateRequest(device_id="device-1", local_date="2025-08-26")
+    ))
+
+    # ステータス更新はレスポンス前に完了しており、失敗したファイルはレスポンスで分かる
+    assert [r.method for r in fake.requests] == ["GET", "POST", "PATCH"]
+    assert response["processed_files"] == ["speech.wav"]
+    assert response["status_update_failed_files"] == ["speech.wav"]